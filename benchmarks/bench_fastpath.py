@@ -0,0 +1,108 @@
+"""
+Microbenchmark of per-request client overhead: SDK path vs. direct (--fast-path) path.
+
+Both paths talk to an in-process mock transport, so the numbers measure only the work done
+on the proxy side (request building, validation, multipart encoding and response handling).
+
+Usage:
+    python benchmarks/bench_fastpath.py [--iterations 500]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+import wave
+
+import httpx
+
+from wyoming_elevenlabs.compatibility import CustomAsyncElevenLabs
+from wyoming_elevenlabs.handler import TTS_CHUNK_SIZE
+from wyoming_elevenlabs.utilities import NamedBytesIO
+
+BASE_URL = "http://backend.invalid/v1"
+SPEECH_BYTES = b"\x00" * 48000  # One second of 24 kHz 16-bit audio
+RECORDING_SECONDS = 3
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def mock_backend(request: httpx.Request) -> httpx.Response:
+    if request.url.path.endswith("/audio/speech"):
+        return httpx.Response(200, content=SPEECH_BYTES, headers={"Content-Type": "audio/pcm"})
+    if request.url.path.endswith("/audio/transcriptions"):
+        request.read()
+        return httpx.Response(200, content=json.dumps({"text": "turn on the kitchen lights"}).encode(), headers={"Content-Type": "application/json"})
+    return httpx.Response(404)
+
+
+def create_recording() -> NamedBytesIO:
+    recording = NamedBytesIO(name="recording.wav")
+    with wave.open(recording, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(b"\x00\x00" * 16000 * RECORDING_SECONDS)
+    return recording
+
+
+async def synthesize(client: CustomAsyncElevenLabs) -> None:
+    async with client.create_speech_stream(model="tts-1", voice="alloy", input="The kitchen lights are on.") as response:
+        async for _ in response.iter_bytes(chunk_size=TTS_CHUNK_SIZE):
+            pass
+
+
+async def transcribe(client: CustomAsyncElevenLabs, recording: NamedBytesIO) -> None:
+    await client.create_transcription(file=recording, model="whisper-1")
+
+
+async def measure(name: str, operation, iterations: int) -> None:
+    for _ in range(20):
+        await operation()
+
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await operation()
+        durations.append(time.perf_counter() - started)
+
+    peaks = []
+    tracemalloc.start()
+    for _ in range(min(iterations, 100)):
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        await operation()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - baseline)
+    tracemalloc.stop()
+
+    _LOGGER.info(
+        "%-30s mean %8.1f us   p50 %8.1f us   peak alloc %8.1f KiB",
+        name, statistics.mean(durations) * 1e6, statistics.median(durations) * 1e6, statistics.mean(peaks) / 1024
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # httpx logs every request at INFO, which would drown the results and slow the loop
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    transport = httpx.MockTransport(mock_backend)
+    sdk_client = CustomAsyncElevenLabs(api_key="benchmark", base_url=BASE_URL, http_client=httpx.AsyncClient(transport=transport))
+    direct_client = CustomAsyncElevenLabs(api_key="benchmark", base_url=BASE_URL)
+    direct_client.enable_direct_audio(httpx.AsyncClient(transport=transport))
+    recording = create_recording()
+
+    await measure("TTS speech (SDK)", lambda: synthesize(sdk_client), args.iterations)
+    await measure("TTS speech (fast path)", lambda: synthesize(direct_client), args.iterations)
+    await measure("STT transcription (SDK)", lambda: transcribe(sdk_client, recording), args.iterations)
+    await measure("STT transcription (fast path)", lambda: transcribe(direct_client, recording), args.iterations)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,388 @@
+"""
+Long-running soak test with memory-growth and leak detection.
+
+Runs the proxy in-process against a local stand-in backend and drives it with mixed
+STT/TTS traffic, client disconnects and upstream errors (HTTP 429/500). With --stt-streaming,
+recordings are also streamed to a stand-in realtime (WebSocket) endpoint. Memory (RSS and
+tracemalloc), live handlers, open file descriptors and open upstream connections and realtime
+sessions are sampled periodically until the deadline. After the warm-up, a least-squares slope
+is fitted to each series. The run fails (exit code 1) if any slope exceeds its limit, and the
+top allocation sites since the warm-up are logged.
+
+Usage:
+    python benchmarks/soak.py --duration 7200 [--fast-path] [--tts-pacing] [--stt-streaming]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import random
+import resource
+import socket
+import sys
+import time
+import tracemalloc
+import weakref
+from functools import partial
+
+from websockets.asyncio.server import ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+from wyoming.asr import Transcribe, Transcript
+from wyoming.audio import AudioChunk, AudioStart, AudioStop
+from wyoming.client import AsyncTcpClient
+from wyoming.server import AsyncServer
+from wyoming.tts import Synthesize, SynthesizeVoice
+
+from wyoming_elevenlabs.compatibility import CustomAsyncElevenLabs, ElevenLabsBackend, create_asr_models, create_tts_voices
+from wyoming_elevenlabs.fastpath import create_shared_http_client
+from wyoming_elevenlabs.handler import DEFAULT_AUDIO_CHANNELS, DEFAULT_AUDIO_WIDTH, TTS_AUDIO_RATE, ElevenLabsEventHandler
+from wyoming_elevenlabs.pacing import AudioPacer
+from wyoming_elevenlabs.ratelimit import AdaptiveConcurrencyLimiter
+
+_LOGGER = logging.getLogger("soak")
+
+STT_RATE = 16000
+STT_CHUNK_BYTES = 1024 * DEFAULT_AUDIO_WIDTH
+TTS_RESPONSE_BYTES = TTS_AUDIO_RATE * DEFAULT_AUDIO_WIDTH * 2  # Two seconds of audio
+READ_TIMEOUT = 10.0  # Seconds a client waits for a response event
+TOP_ALLOCATION_SITES = 15
+
+# Live handlers, to detect connections that are never released
+_live_handlers: weakref.WeakSet = weakref.WeakSet()
+
+
+class TrackedEventHandler(ElevenLabsEventHandler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _live_handlers.add(self)
+
+
+class StandInBackend:
+    """
+    A minimal HTTP/1.1 keep-alive server imitating the speech and transcription endpoints.
+    A configurable fraction of requests fail with HTTP 429 (with Retry-After) or 500.
+
+    WebSocket upgrades (the realtime transcription endpoint) are tunnelled to a local
+    WebSocket server at realtime_address, so both share the API base URL.
+    """
+    def __init__(self, error_rate: float):
+        self._error_rate = error_rate
+        self.realtime_address: tuple[str, int] | None = None
+        self.open_connections = 0
+        self.open_sessions = 0
+        self.requests = 0
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    def close_connections(self) -> None:
+        """Closes the keep-alive connections, which would otherwise keep their handlers waiting."""
+        for writer in self._writers:
+            writer.close()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.open_connections += 1
+        self._writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                _, path, _ = request_line.decode().split(" ", 2)
+                head = [request_line]
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    head.append(line)
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if headers.get("upgrade", "").lower() == "websocket" and self.realtime_address:
+                    await self._tunnel(b"".join(head) + b"\r\n", reader, writer)
+                    return
+                await reader.readexactly(int(headers.get("content-length", 0)))
+                self.requests += 1
+                await self._respond(path, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.open_connections -= 1
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _tunnel(self, head: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        upstream_reader, upstream_writer = await asyncio.open_connection(*self.realtime_address)
+        upstream_writer.write(head)
+
+        async def pipe(source: asyncio.StreamReader, destination: asyncio.StreamWriter) -> None:
+            try:
+                while data := await source.read(65536):
+                    destination.write(data)
+                    await destination.drain()
+            finally:
+                destination.close()
+
+        await asyncio.gather(pipe(reader, upstream_writer), pipe(upstream_reader, writer), return_exceptions=True)
+
+    async def handle_realtime(self, websocket: ServerConnection) -> None:
+        """Imitates a realtime transcription session: one delta, then the transcript on commit."""
+        self.open_sessions += 1
+        sent_delta = False
+        try:
+            async for message in websocket:
+                event_type = json.loads(message).get("type")
+                if event_type == "input_audio_buffer.append" and not sent_delta:
+                    sent_delta = True
+                    await websocket.send(json.dumps({"type": "conversation.item.input_audio_transcription.delta", "delta": "turn on"}))
+                elif event_type == "input_audio_buffer.commit":
+                    self.requests += 1
+                    if random.random() < self._error_rate:
+                        await websocket.send(json.dumps({"type": "error", "error": {"message": "stand-in failure"}}))
+                    else:
+                        await websocket.send(json.dumps({
+                            "type": "conversation.item.input_audio_transcription.completed",
+                            "transcript": "turn on the kitchen lights",
+                        }))
+        except ConnectionClosed:
+            pass
+        finally:
+            self.open_sessions -= 1
+
+    async def _respond(self, path: str, writer: asyncio.StreamWriter) -> None:
+        roll = random.random()
+        if roll < self._error_rate / 2:
+            self._write_head(writer, "429 Too Many Requests", "application/json", 2, {"Retry-After": "0.1"})
+            writer.write(b"{}")
+        elif roll < self._error_rate:
+            self._write_head(writer, "500 Internal Server Error", "application/json", 2)
+            writer.write(b"{}")
+        elif path.endswith("/audio/transcriptions"):
+            body = json.dumps({"text": "turn on the kitchen lights"}).encode()
+            self._write_head(writer, "200 OK", "application/json", len(body))
+            writer.write(body)
+        elif path.endswith("/audio/speech"):
+            self._write_head(writer, "200 OK", "audio/pcm", TTS_RESPONSE_BYTES)
+            chunk = b"\x00" * 4800
+            for _ in range(TTS_RESPONSE_BYTES // len(chunk)):
+                writer.write(chunk)
+                await writer.drain()
+                await asyncio.sleep(0.005)
+        else:
+            self._write_head(writer, "404 Not Found", "text/plain", 0)
+        await writer.drain()
+
+    @staticmethod
+    def _write_head(writer: asyncio.StreamWriter, status: str, content_type: str, length: int, extra: dict | None = None) -> None:
+        lines = [f"HTTP/1.1 {status}", f"Content-Type: {content_type}", f"Content-Length: {length}"]
+        lines.extend(f"{name}: {value}" for name, value in (extra or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+
+
+class TrafficStats:
+    def __init__(self):
+        self.counts: dict[str, int] = {}
+
+    def record(self, outcome: str) -> None:
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+
+async def run_stt(host: str, port: int, disconnect: bool) -> str:
+    async with AsyncTcpClient(host, port) as client:
+        await client.write_event(Transcribe(language="en").event())
+        await client.write_event(AudioStart(rate=STT_RATE, width=DEFAULT_AUDIO_WIDTH, channels=1).event())
+        chunks = random.randint(10, 60)
+        for index in range(chunks):
+            await client.write_event(AudioChunk(rate=STT_RATE, width=DEFAULT_AUDIO_WIDTH, channels=1, audio=b"\x01\x00" * (STT_CHUNK_BYTES // 2)).event())
+            if disconnect and index == chunks // 2:
+                return "stt_disconnect"
+        await client.write_event(AudioStop().event())
+        while True:
+            event = await asyncio.wait_for(client.read_event(), READ_TIMEOUT)
+            if event is None:
+                return "stt_closed"
+            if Transcript.is_type(event.type):
+                return "stt_ok"
+
+
+async def run_tts(host: str, port: int, disconnect: bool) -> str:
+    async with AsyncTcpClient(host, port) as client:
+        await client.write_event(Synthesize(text="The kitchen lights are on.", voice=SynthesizeVoice(name="alloy")).event())
+        chunks = 0
+        while True:
+            event = await asyncio.wait_for(client.read_event(), READ_TIMEOUT)
+            if event is None:
+                return "tts_closed"
+            if AudioChunk.is_type(event.type):
+                chunks += 1
+                if disconnect and chunks == 3:
+                    return "tts_disconnect"
+            elif AudioStop.is_type(event.type):
+                return "tts_ok"
+
+
+async def drive_traffic(host: str, port: int, deadline: float, stats: TrafficStats) -> None:
+    while time.monotonic() < deadline:
+        scenario = random.choice((run_stt, run_tts))
+        disconnect = random.random() < 0.1
+        try:
+            stats.record(await scenario(host, port, disconnect))
+        except TimeoutError:
+            # The proxy logs upstream failures and sends nothing back
+            stats.record(f"{scenario.__name__}_no_response")
+        except (ConnectionError, OSError):
+            stats.record(f"{scenario.__name__}_connection_error")
+
+
+def find_free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def read_rss_bytes() -> int:
+    """Current resident set size (Linux), falling back to the peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def count_open_fds() -> int:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return 0
+
+
+def slope_per_minute(samples: list[tuple[float, float]]) -> float:
+    """Least-squares slope of (seconds, value) samples, in units per minute."""
+    if len(samples) < 2:
+        return 0.0
+    mean_t = sum(t for t, _ in samples) / len(samples)
+    mean_v = sum(v for _, v in samples) / len(samples)
+    variance = sum((t - mean_t) ** 2 for t, _ in samples)
+    if variance == 0:
+        return 0.0
+    return sum((t - mean_t) * (v - mean_v) for t, v in samples) / variance * 60
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=7200, help="Seconds to run")
+    parser.add_argument("--warmup", type=float, default=300, help="Seconds excluded from the slope fit")
+    parser.add_argument("--sample-interval", type=float, default=60, help="Seconds between memory samples")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent simulated Wyoming clients")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Fraction of backend requests failing with 429/500")
+    parser.add_argument("--max-rss-slope-kib", type=float, default=256, help="Allowed RSS growth in KiB per minute")
+    parser.add_argument("--max-traced-slope-kib", type=float, default=64, help="Allowed tracemalloc growth in KiB per minute")
+    parser.add_argument("--max-connection-slope", type=float, default=0.5, help="Allowed growth of live handlers, open fds, connections or realtime sessions per minute")
+    parser.add_argument("--fast-path", action="store_true", help="Use the direct HTTP client instead of the SDK")
+    parser.add_argument("--tts-pacing", action="store_true", help="Enable paced TTS output")
+    parser.add_argument("--stt-streaming", action="store_true", help="Stream recordings to the stand-in realtime transcription endpoint")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    # Expected upstream errors would otherwise flood the output
+    logging.getLogger("wyoming_elevenlabs").setLevel(logging.CRITICAL)
+    # The report groups allocation sites by line, so one frame suffices; deeper tracebacks slow the proxy enough to cause timeouts
+    tracemalloc.start(1)
+
+    backend = StandInBackend(args.error_rate)
+    backend_server = await asyncio.start_server(backend.handle_connection, "127.0.0.1", 0)
+    backend_url = f"http://127.0.0.1:{backend_server.sockets[0].getsockname()[1]}/v1"
+    realtime_server = await serve(backend.handle_realtime, "127.0.0.1", 0)
+    backend.realtime_address = realtime_server.sockets[0].getsockname()[:2]
+
+    stt_client = CustomAsyncElevenLabs(api_key=None, base_url=backend_url, backend=ElevenLabsBackend.SPEACHES)
+    tts_client = CustomAsyncElevenLabs(api_key=None, base_url=backend_url, backend=ElevenLabsBackend.SPEACHES)
+    http_client = None
+    if args.fast_path:
+        http_client = create_shared_http_client()
+        stt_client.enable_direct_audio(http_client)
+        tts_client.enable_direct_audio(http_client)
+
+    host, port = "127.0.0.1", find_free_port()
+    proxy = AsyncServer.from_uri(f"tcp://{host}:{port}")
+    await proxy.start(
+        partial(
+            TrackedEventHandler,
+            stt_client=stt_client,
+            tts_client=tts_client,
+            stt_limiter=AdaptiveConcurrencyLimiter("STT", deadline=5.0),
+            tts_limiter=AdaptiveConcurrencyLimiter("TTS", deadline=5.0),
+            asr_models=create_asr_models(["whisper-1"], backend_url, ["en"]),
+            stt_streaming=args.stt_streaming,
+            tts_voices=create_tts_voices(["tts-1"], ["alloy"], backend_url, ["en"]),
+            tts_pacer=AudioPacer(TTS_AUDIO_RATE * DEFAULT_AUDIO_WIDTH * DEFAULT_AUDIO_CHANNELS) if args.tts_pacing else None
+        )
+    )
+    _LOGGER.info("Soaking proxy at %s:%d against stand-in backend %s for %.0f s", host, port, backend_url, args.duration)
+
+    started = time.monotonic()
+    deadline = started + args.duration
+    stats = TrafficStats()
+    traffic = [asyncio.create_task(drive_traffic(host, port, deadline, stats)) for _ in range(args.clients)]
+
+    series: dict[str, list[tuple[float, float]]] = {
+        "rss_kib": [], "traced_kib": [], "live_handlers": [], "open_fds": [], "backend_connections": [], "realtime_sessions": []
+    }
+    baseline_snapshot = None
+    # Sample only until the deadline; the draining clients afterwards would pull every slope down
+    while (remaining := deadline - time.monotonic()) > 0:
+        await asyncio.sleep(min(args.sample_interval, remaining))
+        elapsed = time.monotonic() - started
+        gc.collect()
+        if elapsed < args.warmup:
+            continue
+        if baseline_snapshot is None:
+            baseline_snapshot = tracemalloc.take_snapshot()
+        series["rss_kib"].append((elapsed, read_rss_bytes() / 1024))
+        series["traced_kib"].append((elapsed, tracemalloc.get_traced_memory()[0] / 1024))
+        series["live_handlers"].append((elapsed, len(_live_handlers)))
+        series["open_fds"].append((elapsed, count_open_fds()))
+        series["backend_connections"].append((elapsed, backend.open_connections))
+        series["realtime_sessions"].append((elapsed, backend.open_sessions))
+        _LOGGER.info(
+            "t=%5.0fs rss=%.0f KiB traced=%.0f KiB handlers=%d fds=%d backend_conns=%d realtime_sessions=%d requests=%d traffic=%s",
+            elapsed, *(values[-1][1] for values in series.values()), backend.requests, stats.counts
+        )
+
+    await asyncio.gather(*traffic)
+    await proxy.stop()
+    backend_server.close()
+    backend.close_connections()
+    await backend_server.wait_closed()
+    realtime_server.close()
+    await realtime_server.wait_closed()
+    if http_client:
+        await http_client.aclose()
+
+    limits = {
+        "rss_kib": args.max_rss_slope_kib,
+        "traced_kib": args.max_traced_slope_kib,
+        "live_handlers": args.max_connection_slope,
+        "open_fds": args.max_connection_slope,
+        "backend_connections": args.max_connection_slope,
+        "realtime_sessions": args.max_connection_slope,
+    }
+    failures = []
+    for name, samples in series.items():
+        slope = slope_per_minute(samples)
+        _LOGGER.info("%-20s slope %+10.2f per minute (limit %.2f)", name, slope, limits[name])
+        if slope > limits[name]:
+            failures.append(name)
+
+    if not failures:
+        _LOGGER.info("PASS: no sustained growth detected")
+        return 0
+
+    _LOGGER.error("FAIL: sustained growth in %s", ", ".join(failures))
+    if baseline_snapshot is not None:
+        _LOGGER.error("Top allocation sites since warm-up:")
+        for stat in tracemalloc.take_snapshot().compare_to(baseline_snapshot, "lineno")[:TOP_ALLOCATION_SITES]:
+            _LOGGER.error("  %s", stat)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
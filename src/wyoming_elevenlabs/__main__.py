@@ -2,11 +2,13 @@ import argparse
 import asyncio
 import logging
 import os
+import tempfile
 from functools import partial
 
 from wyoming.server import AsyncServer
 
 from . import __version__
+from .batch import transcribe_batch
 from .compatibility import (
     CustomAsyncElevenLabs,
     ElevenLabsBackend,
@@ -15,7 +17,14 @@ from .compatibility import (
     create_tts_voices,
     tts_voice_to_string,
 )
-from .handler import ElevenLabsEventHandler
+from .diagnostics import LoopLagMonitor, SamplingProfiler
+from .fastpath import create_shared_http_client
+from .handler import DEFAULT_AUDIO_CHANNELS, DEFAULT_AUDIO_WIDTH, TTS_AUDIO_RATE, ElevenLabsEventHandler
+from .pacing import AudioPacer
+from .race import RaceContestant, TranscriptionRace
+from .ratelimit import AdaptiveConcurrencyLimiter
+from .routing import ModelRouter, ModelRoutingPolicy
+from .tracing import Tracer
 
 
 def configure_logging(level):
@@ -84,6 +93,29 @@ async def main():
         default=os.getenv("STT_PROMPT", None),
         help="Optional prompt for STT requests (ElevenLabs createTranscription API)."
     )
+    parser.add_argument(
+        "--stt-streaming",
+        action="store_true",
+        default=os.getenv("STT_STREAMING", "false").lower() in ("1", "true", "yes"),
+        help="Stream audio to the realtime (WebSocket) transcription API while the user speaks"
+    )
+    parser.add_argument(
+        "--stt-race-models",
+        nargs='+',
+        default=os.getenv("STT_RACE_MODELS", '').split(),
+        help="STT models to send each recording to at once, as MODEL or MODEL@BASE_URL. The first non-empty transcript wins."
+    )
+    parser.add_argument(
+        "--stt-race-preferred",
+        default=os.getenv("STT_RACE_PREFERRED", None),
+        help="STT race entry whose transcript wins if it arrives within the grace window"
+    )
+    parser.add_argument(
+        "--stt-race-grace-ms",
+        type=float,
+        default=float(os.getenv("STT_RACE_GRACE_MS", "300")),
+        help="Milliseconds to wait for the preferred STT race entry after the first transcript arrives"
+    )
 
     # TTS configuration
     parser.add_argument(
@@ -129,6 +161,145 @@ async def main():
         default=os.getenv("TTS_INSTRUCTIONS", None),
         help="Optional instructions for TTS requests (ElevenLabs createSpeech API)."
     )
+    parser.add_argument(
+        "--tts-pacing",
+        action="store_true",
+        default=os.getenv("TTS_PACING", "false").lower() in ("1", "true", "yes"),
+        help="Send TTS audio at real time (plus a lead) with backpressure instead of as fast as it arrives"
+    )
+    parser.add_argument(
+        "--tts-prebuffer-ms",
+        type=float,
+        default=float(os.getenv("TTS_PREBUFFER_MS", "300")),
+        help="Milliseconds of TTS audio to buffer before paced output starts"
+    )
+    parser.add_argument(
+        "--tts-pacing-lead-ms",
+        type=float,
+        default=float(os.getenv("TTS_PACING_LEAD_MS", "500")),
+        help="Milliseconds paced TTS output may run ahead of real time"
+    )
+    parser.add_argument(
+        "--tts-max-buffer-ms",
+        type=float,
+        default=float(os.getenv("TTS_MAX_BUFFER_MS", "3000")),
+        help="Milliseconds of TTS audio buffered per connection before reading from upstream pauses"
+    )
+
+    # Upstream concurrency configuration
+    parser.add_argument(
+        "--stt-max-concurrency",
+        type=int,
+        default=int(os.getenv("STT_MAX_CONCURRENCY", "4")),
+        help="Maximum concurrent STT requests. The actual limit adapts to rate limiting (429/Retry-After)."
+    )
+    parser.add_argument(
+        "--tts-max-concurrency",
+        type=int,
+        default=int(os.getenv("TTS_MAX_CONCURRENCY", "4")),
+        help="Maximum concurrent TTS requests. The actual limit adapts to rate limiting (429/Retry-After) and time to first byte."
+    )
+    parser.add_argument(
+        "--upstream-deadline",
+        type=float,
+        default=float(os.getenv("UPSTREAM_DEADLINE", "30")),
+        help="Seconds an upstream request may spend queued and retrying after rate limiting before it fails"
+    )
+
+    parser.add_argument(
+        "--model-routing",
+        type=lambda name: ModelRoutingPolicy[name.upper()],
+        choices=list(ModelRoutingPolicy),
+        default=ModelRoutingPolicy[os.getenv("MODEL_ROUTING", "FIRST").upper()],
+        help="How to pick a model when a request names none (TTS: only the voice). FIRST uses the first configured model; LATENCY uses the healthy one "
+             "with the lowest rolling median latency (TTS: time to first byte; STT: request time per second of audio)."
+    )
+    parser.add_argument(
+        "--fast-path",
+        action="store_true",
+        default=os.getenv("FAST_PATH", "false").lower() in ("1", "true", "yes"),
+        help="Send speech and transcription requests directly over a shared HTTP connection pool instead of through the SDK"
+    )
+
+    # Tracing configuration
+    parser.add_argument(
+        "--trace-file",
+        default=os.getenv("TRACE_FILE", None),
+        help="Path of a rotating JSONL file for per-request latency traces (OpenTelemetry span format). Disabled if unset."
+    )
+    parser.add_argument(
+        "--trace-slow-threshold-ms",
+        type=float,
+        default=float(os.getenv("TRACE_SLOW_THRESHOLD_MS", "1500")),
+        help="Requests taking at least this many milliseconds are always traced"
+    )
+    parser.add_argument(
+        "--trace-sample-rate",
+        type=float,
+        default=float(os.getenv("TRACE_SAMPLE_RATE", "0.01")),
+        help="Fraction of the remaining (fast, successful) requests to trace (0.0 to 1.0)"
+    )
+    parser.add_argument(
+        "--trace-max-bytes",
+        type=int,
+        default=int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024))),
+        help="Size in bytes at which the trace file is rotated"
+    )
+    parser.add_argument(
+        "--trace-backup-count",
+        type=int,
+        default=int(os.getenv("TRACE_BACKUP_COUNT", "5")),
+        help="Number of rotated trace files to keep"
+    )
+
+    # Diagnostics configuration
+    parser.add_argument(
+        "--loop-lag-threshold-ms",
+        type=float,
+        default=float(os.getenv("LOOP_LAG_THRESHOLD_MS", "200")),
+        help="Log the running task and stack when the event loop is blocked longer than this (0 disables)"
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default=os.getenv("PROFILE_DIR", tempfile.gettempdir()),
+        help="Directory for profiler snapshots (flamegraph folded stacks), taken on SIGUSR1"
+    )
+    parser.add_argument(
+        "--profile-seconds",
+        type=float,
+        default=float(os.getenv("PROFILE_SECONDS", "30")),
+        help="Duration of each profiler snapshot in seconds"
+    )
+    parser.add_argument(
+        "--profile-on-start",
+        action="store_true",
+        default=os.getenv("PROFILE_ON_START", "false").lower() in ("1", "true", "yes"),
+        help="Take a profiler snapshot as soon as the server starts"
+    )
+
+    # Batch transcription (options rather than a subcommand, so list options like --stt-models cannot swallow it)
+    parser.add_argument(
+        "--batch",
+        metavar="INPUT",
+        default=None,
+        help="Transcribe a directory of WAV files (searched recursively) or a manifest with one path (or JSON object with a \"path\") per line to JSONL and exit, instead of running the server"
+    )
+    parser.add_argument(
+        "--batch-output",
+        default="transcripts.jsonl",
+        help="JSONL file batch results are appended to. Files already transcribed in it are skipped, so runs can be resumed."
+    )
+    parser.add_argument(
+        "--batch-concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of concurrent batch transcription requests"
+    )
+    parser.add_argument(
+        "--batch-model",
+        default=None,
+        help="STT model for batch transcription (default is the first of --stt-models)"
+    )
 
     args = parser.parse_args()
 
@@ -138,6 +309,8 @@ async def main():
     _logger.info("Starting Wyoming ElevenLabs %s", __version__)
 
     # Create factories and clients
+    http_client = create_shared_http_client() if args.fast_path else None
+
     if args.stt_backend is None:
         _logger.debug("STT backend is None, autodetecting...")
         stt_factory = CustomAsyncElevenLabs.create_autodetected_factory()
@@ -145,6 +318,29 @@ async def main():
         stt_factory = CustomAsyncElevenLabs.create_backend_factory(args.stt_backend)
     stt_client = await stt_factory(api_key=args.stt_elevenlabs_key, base_url=args.stt_elevenlabs_url)
     _logger.debug("Detected STT backend: %s", stt_client.backend)
+    if http_client:
+        stt_client.enable_direct_audio(http_client)
+
+    asr_models = create_asr_models(args.stt_models, args.stt_elevenlabs_url, args.languages)
+
+    if args.batch:
+        model_name = args.batch_model or (asr_models[0].name if asr_models else None)
+        if not model_name:
+            _logger.error("No STT model specified for batch transcription")
+            return
+        await transcribe_batch(
+            stt_client,
+            source=args.batch,
+            output_path=args.batch_output,
+            model_name=model_name,
+            concurrency=args.batch_concurrency,
+            deadline=args.upstream_deadline,
+            temperature=args.stt_temperature,
+            prompt=args.stt_prompt
+        )
+        if http_client:
+            await http_client.aclose()
+        return
 
     if args.tts_backend is None:
         _logger.debug("TTS backend is None, autodetecting...")
@@ -153,8 +349,8 @@ async def main():
         tts_factory = CustomAsyncElevenLabs.create_backend_factory(args.tts_backend)
     tts_client = await tts_factory(api_key=args.tts_elevenlabs_key, base_url=args.tts_elevenlabs_url)
     _logger.debug("Detected TTS backend: %s", tts_client.backend)
-
-    asr_models = create_asr_models(args.stt_models, args.stt_elevenlabs_url, args.languages)
+    if http_client:
+        tts_client.enable_direct_audio(http_client)
 
     if args.tts_voices:
         # If TTS_VOICES is set, use that
@@ -174,24 +370,96 @@ async def main():
     else:
         _logger.warning("No TTS models specified")
 
+    stt_limiter = AdaptiveConcurrencyLimiter("STT", max_limit=args.stt_max_concurrency, deadline=args.upstream_deadline)
+    tts_limiter = AdaptiveConcurrencyLimiter("TTS", max_limit=args.tts_max_concurrency, deadline=args.upstream_deadline)
+
+    stt_race = None
+    if args.stt_race_models:
+        # Entries on other endpoints get their own client. Every entry gets its own limiter, so
+        # contestants of one race never queue behind each other for a slot.
+        endpoints = {args.stt_elevenlabs_url: stt_client}
+        contestants = []
+        for entry in args.stt_race_models:
+            model_name, _, base_url = entry.partition("@")
+            base_url = base_url or args.stt_elevenlabs_url
+            if base_url not in endpoints:
+                race_client = await CustomAsyncElevenLabs.create_autodetected_factory()(api_key=args.stt_elevenlabs_key, base_url=base_url)
+                if http_client:
+                    race_client.enable_direct_audio(http_client)
+                endpoints[base_url] = race_client
+            race_limiter = AdaptiveConcurrencyLimiter(f"STT race {entry}", max_limit=args.stt_max_concurrency, deadline=args.upstream_deadline)
+            contestants.append(RaceContestant(entry, endpoints[base_url], model_name, race_limiter))
+        stt_race = TranscriptionRace(contestants, preferred_label=args.stt_race_preferred, grace_ms=args.stt_race_grace_ms)
+        _logger.info("Racing STT models: %s", ", ".join(stt_race.labels))
+
+    stt_router = tts_router = None
+    if args.model_routing == ModelRoutingPolicy.LATENCY:
+        stt_router = ModelRouter("STT")
+        tts_router = ModelRouter("TTS")
+
+    tts_pacer = None
+    if args.tts_pacing:
+        tts_pacer = AudioPacer(
+            bytes_per_second=TTS_AUDIO_RATE * DEFAULT_AUDIO_WIDTH * DEFAULT_AUDIO_CHANNELS,
+            prebuffer_ms=args.tts_prebuffer_ms,
+            lead_ms=args.tts_pacing_lead_ms,
+            max_buffer_ms=args.tts_max_buffer_ms
+        )
+
+    tracer = Tracer(
+        path=args.trace_file,
+        slow_threshold_ms=args.trace_slow_threshold_ms,
+        sample_rate=args.trace_sample_rate,
+        max_bytes=args.trace_max_bytes,
+        backup_count=args.trace_backup_count
+    )
+    if tracer.enabled:
+        _logger.info("Writing request traces to %s", args.trace_file)
+
+    # Diagnostics
+    loop_lag_monitor = None
+    if args.loop_lag_threshold_ms > 0:
+        loop_lag_monitor = LoopLagMonitor(args.loop_lag_threshold_ms)
+        loop_lag_monitor.start()
+
+    profiler = SamplingProfiler(args.profile_dir, args.profile_seconds)
+    if profiler.install_signal_handler():
+        _logger.info("Send SIGUSR1 (kill -USR1 %d) to write a %.0f second profile to %s", os.getpid(), args.profile_seconds, args.profile_dir)
+    if args.profile_on_start:
+        profiler.start()
+
     # Create server
     server = AsyncServer.from_uri(args.uri)
 
     # Run server
     _logger.info("Starting server at %s", args.uri)
-    await server.run(
-        partial(
-            ElevenLabsEventHandler,
-            stt_client=stt_client,
-            tts_client=tts_client,
-            client_lock=asyncio.Lock(),
-            asr_models=asr_models,
-            stt_temperature=args.stt_temperature,
-            tts_voices=tts_voices,
-            tts_speed=args.tts_speed,
-            tts_instructions=args.tts_instructions,
-            stt_prompt=args.stt_prompt
+    try:
+        await server.run(
+            partial(
+                ElevenLabsEventHandler,
+                stt_client=stt_client,
+                tts_client=tts_client,
+                stt_limiter=stt_limiter,
+                tts_limiter=tts_limiter,
+                asr_models=asr_models,
+                stt_temperature=args.stt_temperature,
+                tts_voices=tts_voices,
+                tts_speed=args.tts_speed,
+                tts_instructions=args.tts_instructions,
+                stt_prompt=args.stt_prompt,
+                stt_streaming=args.stt_streaming,
+                tracer=tracer,
+                stt_router=stt_router,
+                tts_router=tts_router,
+                tts_pacer=tts_pacer,
+                stt_race=stt_race
+            )
         )
-    )
+    finally:
+        if loop_lag_monitor:
+            loop_lag_monitor.stop()
+        tracer.close()
+        if http_client:
+            await http_client.aclose()
 
 asyncio.run(main())
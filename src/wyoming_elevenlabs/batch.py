@@ -0,0 +1,183 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import wave
+
+from .compatibility import CustomAsyncElevenLabs
+from .ratelimit import AdaptiveConcurrencyLimiter
+
+_LOGGER = logging.getLogger(__name__)
+
+PROGRESS_LOG_INTERVAL = 10.0  # Seconds between progress reports
+
+
+def discover_audio_files(source: str) -> list[str]:
+    """
+    Lists the WAV files to transcribe.
+
+    Args:
+        source (str): A directory (searched recursively for *.wav) or a manifest file.
+            A manifest contains one path per line, or JSONL objects with a "path" key.
+            Relative manifest paths are resolved against the manifest's directory.
+
+    Returns:
+        list[str]: The audio file paths in a stable order, without duplicates. Invalid manifest lines are skipped.
+    """
+    if os.path.isdir(source):
+        paths = []
+        for root, _, filenames in os.walk(source):
+            paths.extend(os.path.join(root, filename) for filename in filenames if filename.lower().endswith(".wav"))
+        return sorted(paths)
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    # A dict keeps the manifest order while dropping duplicates
+    paths: dict[str, None] = {}
+    with open(source, encoding="utf-8") as manifest:
+        for line_number, line in enumerate(manifest, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                try:
+                    path = json.loads(line).get("path")
+                except json.JSONDecodeError:
+                    path = None
+                if not isinstance(path, str) or not path:
+                    _LOGGER.warning("Skipping manifest line %d without a \"path\": %s", line_number, line)
+                    continue
+            else:
+                path = line
+            paths[os.path.normpath(path if os.path.isabs(path) else os.path.join(base_dir, path))] = None
+    return list(paths)
+
+
+def load_completed(output_path: str) -> set[str]:
+    """Returns the paths already transcribed successfully in an existing output file, so a run can resume."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding="utf-8") as output:
+        for line in output:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from an interrupted run
+                continue
+            if "error" not in result:
+                completed.add(os.path.normpath(result["path"]))
+    return completed
+
+
+def get_audio_seconds(path: str) -> float:
+    """Returns the duration of a WAV file in seconds."""
+    with wave.open(path, "rb") as wav_file:
+        return wav_file.getnframes() / wav_file.getframerate()
+
+
+class BatchProgress:
+    """
+    Tracks and reports the throughput of a batch run.
+    """
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self._started = time.monotonic()
+        self._last_report = self._started
+
+    def record(self, audio_seconds: float, failed: bool) -> None:
+        self.done += 1
+        self.audio_seconds += audio_seconds
+        if failed:
+            self.failed += 1
+        now = time.monotonic()
+        if now - self._last_report >= PROGRESS_LOG_INTERVAL:
+            self._last_report = now
+            self.report("Progress")
+
+    def report(self, label: str) -> None:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        _LOGGER.info(
+            "%s: %d/%d files (%d failed) in %.1f s, %.2f files/s, %.2f audio-seconds/s",
+            label, self.done, self.total, self.failed, elapsed, self.done / elapsed, self.audio_seconds / elapsed
+        )
+
+
+async def transcribe_batch(
+    stt_client: CustomAsyncElevenLabs,
+    source: str,
+    output_path: str,
+    model_name: str,
+    concurrency: int,
+    deadline: float,
+    temperature: float | None = None,
+    prompt: str | None = None,
+) -> BatchProgress:
+    """
+    Transcribes a directory or manifest of WAV files and appends the results to a JSONL file.
+    Files that already have a successful result in the output file are skipped.
+
+    Args:
+        stt_client (CustomAsyncElevenLabs): The STT client.
+        source (str): A directory of WAV files or a manifest file (see discover_audio_files).
+        output_path (str): The JSONL file results are appended to.
+        model_name (str): The STT model to use.
+        concurrency (int): The maximum number of concurrent requests.
+        deadline (float): Seconds a request may spend queued and retrying after rate limiting.
+        temperature (float | None): Optional sampling temperature.
+        prompt (str | None): Optional prompt.
+
+    Returns:
+        BatchProgress: The final counts and throughput.
+    """
+    completed = load_completed(output_path)
+    pending = [path for path in discover_audio_files(source) if path not in completed]
+    _LOGGER.info("Transcribing %d files with %s (%d already done), concurrency %d", len(pending), model_name, len(completed), concurrency)
+
+    limiter = AdaptiveConcurrencyLimiter("STT", max_limit=concurrency, initial_limit=concurrency, deadline=deadline)
+    progress = BatchProgress(len(pending))
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for path in pending:
+        queue.put_nowait(path)
+
+    with open(output_path, "a", encoding="utf-8") as output:
+        async def transcribe_file(path: str) -> dict:
+            audio_seconds = get_audio_seconds(path)
+            with open(path, "rb") as audio_file:
+                def create_transcription():
+                    return stt_client.create_transcription(
+                        file=audio_file,
+                        model=model_name,
+                        temperature=temperature,
+                        prompt=prompt
+                    )
+
+                started = time.monotonic()
+                text = await limiter.call(create_transcription)
+            return {
+                "path": path,
+                "text": text,
+                "model": model_name,
+                "audio_seconds": round(audio_seconds, 3),
+                "latency_ms": round((time.monotonic() - started) * 1000),
+            }
+
+        async def worker() -> None:
+            while not queue.empty():
+                path = queue.get_nowait()
+                try:
+                    result = await transcribe_file(path)
+                except Exception as e:
+                    _LOGGER.error("Failed to transcribe %s: %s", path, e)
+                    result = {"path": path, "error": str(e) or type(e).__name__}
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                output.flush()
+                progress.record(result.get("audio_seconds", 0.0), "error" in result)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    progress.report("Finished")
+    return progress
@@ -1,10 +1,17 @@
 import logging
+from collections.abc import Awaitable, Callable
+from contextlib import AbstractAsyncContextManager
 from enum import Enum
-from typing import override
+from typing import Any, BinaryIO, override
 
-from elevenlabs import AsyncElevenLabs
+import httpx
+from elevenlabs import NOT_GIVEN, AsyncElevenLabs
 from wyoming.info import AsrModel, Attribution, TtsVoice
 
+from .fastpath import DirectAudioClient
+from .realtime import RealtimeTranscriptionSession, realtime_transcription_url
+from .utilities import Transcription
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -163,8 +170,11 @@ class CustomAsyncElevenLabs(AsyncElevenLabs):
     def __init__(self, *args, **kwargs):
         if "api_key" not in kwargs or not kwargs["api_key"]:
             kwargs["api_key"] = ""
+        # Retries belong to the concurrency limiter, which backs off and honours Retry-After
+        kwargs.setdefault("max_retries", 0)
         self.backend: ElevenLabsBackend = kwargs.pop("backend", ElevenLabsBackend.ELEVENLABS)
         super().__init__(*args, **kwargs)
+        self._direct_audio: DirectAudioClient | None = None
 
     @property
     @override
@@ -281,6 +291,97 @@ class CustomAsyncElevenLabs(AsyncElevenLabs):
             _LOGGER.exception(e, "Failed to fetch /audio/speech/voices")
             raise
 
+    # Realtime (WebSocket) transcription
+
+    @property
+    def supports_realtime_transcription(self) -> bool:
+        """
+        Whether the backend offers realtime transcription over WebSocket.
+        Kokoro-FastAPI is TTS-only, so it is excluded.
+        """
+        return self.backend in (ElevenLabsBackend.ELEVENLABS, ElevenLabsBackend.SPEACHES)
+
+    def open_realtime_transcription(
+        self,
+        model_name: str,
+        sample_rate: int,
+        channels: int,
+        language: str | None = None,
+        prompt: str | None = None,
+        on_delta: Callable[[str], Awaitable[None]] | None = None,
+    ) -> RealtimeTranscriptionSession:
+        """
+        Opens a realtime transcription session. The connection is established in the background.
+        """
+        headers = {}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        if self.backend == ElevenLabsBackend.ELEVENLABS:
+            headers["OpenAI-Beta"] = "realtime=v1"
+        session = RealtimeTranscriptionSession(
+            url=realtime_transcription_url(str(self.base_url)),
+            headers=headers,
+            model=model_name,
+            sample_rate=sample_rate,
+            channels=channels,
+            language=language,
+            prompt=prompt,
+            on_delta=on_delta
+        )
+        session.start()
+        return session
+
+    # Hot path (speech and transcription)
+
+    def enable_direct_audio(self, http_client: httpx.AsyncClient) -> None:
+        """
+        Sends speech and transcription requests directly on the given connection pool, bypassing the SDK.
+        Discovery requests still use the SDK.
+        """
+        self._direct_audio = DirectAudioClient(http_client, str(self.base_url), self.api_key)
+
+    def create_speech_stream(
+        self,
+        model: str,
+        voice: str,
+        input: str,
+        speed: float | None = None,
+        instructions: str | None = None
+    ) -> AbstractAsyncContextManager[Any]:
+        """
+        Opens a streaming speech response. The response provides iter_bytes(chunk_size).
+        """
+        if self._direct_audio:
+            return self._direct_audio.stream_speech(model=model, voice=voice, input=input, speed=speed, instructions=instructions)
+        return self.audio.speech.with_streaming_response.create(
+            model=model,
+            voice=voice,
+            input=input,
+            speed=speed or NOT_GIVEN,
+            instructions=instructions or NOT_GIVEN
+        )
+
+    async def create_transcription(
+        self,
+        file: BinaryIO,
+        model: str,
+        temperature: float | None = None,
+        prompt: str | None = None
+    ) -> Transcription:
+        """
+        Transcribes an audio file from the start and returns the text, with the response headers.
+        """
+        if self._direct_audio:
+            return await self._direct_audio.transcribe(file=file, model=model, temperature=temperature, prompt=prompt)
+        file.seek(0)
+        response = await self.audio.transcriptions.with_raw_response.create(
+            file=file,
+            model=model,
+            temperature=temperature or NOT_GIVEN,
+            prompt=prompt or NOT_GIVEN
+        )
+        return Transcription(response.parse().text, response.headers)
+
     # Unified API
 
     async def list_supported_voices(self, model_names: str | list[str], languages: list[str]) -> list[TtsVoiceModel]:
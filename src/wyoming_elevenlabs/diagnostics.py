@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from types import FrameType
+
+_LOGGER = logging.getLogger(__name__)
+
+LOOP_LAG_CHECK_INTERVAL = 0.05  # Seconds between heartbeats of the event loop
+PROFILER_SAMPLE_INTERVAL = 0.005  # Seconds between stack samples
+
+
+def _describe_task(task: asyncio.Task | None) -> str:
+    """Returns a short description of a task and the coroutine it is running."""
+    if task is None:
+        return "no task (callback or I/O handling)"
+    coroutine = task.get_coro()
+    name = getattr(coroutine, "__qualname__", repr(coroutine))
+    return f"{task.get_name()} running {name}"
+
+
+def _fold_stack(frame: FrameType | None) -> str:
+    """Folds a frame stack (outermost first) into a flamegraph 'folded' stack line."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class LoopLagMonitor:
+    """
+    Detects a blocked event loop.
+
+    The loop updates a heartbeat every LOOP_LAG_CHECK_INTERVAL seconds. A watchdog thread
+    notices when the heartbeat is late by more than the threshold and, while the loop is
+    still blocked, logs the running task and the stack of the loop thread. Once the loop
+    resumes, the total scheduling delay is logged at debug level, or as a warning if the
+    stall was too short for the watchdog to catch.
+    """
+    def __init__(self, threshold_ms: float):
+        """
+        Initializes a LoopLagMonitor instance.
+
+        Args:
+            threshold_ms (float): Scheduling delay in milliseconds above which a stall is reported.
+        """
+        self._threshold = threshold_ms / 1000
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._expected_beat = 0.0
+        self._reported_beat = 0.0
+        self._handle: asyncio.TimerHandle | None = None
+        self._stopped = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Starts monitoring the running event loop. Must be called from the loop thread."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._expected_beat = time.monotonic() + LOOP_LAG_CHECK_INTERVAL
+        self._handle = self._loop.call_later(LOOP_LAG_CHECK_INTERVAL, self._beat)
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+        _LOGGER.debug("Event loop lag monitor started with threshold %.0f ms", self._threshold * 1000)
+
+    def stop(self) -> None:
+        """Stops monitoring."""
+        self._stopped.set()
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+
+    def _beat(self) -> None:
+        now = time.monotonic()
+        lag = now - self._expected_beat
+        if lag > self._threshold:
+            if self._reported_beat == self._expected_beat:
+                # The watchdog already reported this stall with its stack; only add how long it lasted
+                _LOGGER.debug("Event loop stall reported above ended after %.0f ms", lag * 1000)
+            else:
+                _LOGGER.warning("Event loop was blocked for %.0f ms", lag * 1000)
+        self._expected_beat = now + LOOP_LAG_CHECK_INTERVAL
+        self._handle = self._loop.call_later(LOOP_LAG_CHECK_INTERVAL, self._beat)
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self._threshold / 2):
+            expected_beat = self._expected_beat
+            lag = time.monotonic() - expected_beat
+            if lag <= self._threshold or expected_beat == self._reported_beat:
+                continue
+            # Report each stall once, while it is still in progress
+            self._reported_beat = expected_beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "unavailable"
+            _LOGGER.warning(
+                "Event loop blocked for more than %.0f ms in %s\n%s",
+                lag * 1000,
+                _describe_task(asyncio.current_task(self._loop)),
+                stack
+            )
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of the event loop thread for a fixed duration and writes the result
+    as flamegraph 'folded' stacks (compatible with flamegraph.pl, speedscope and inferno).
+    """
+    def __init__(self, output_dir: str, duration: float):
+        """
+        Initializes a SamplingProfiler instance.
+
+        Args:
+            output_dir (str): Directory the profile snapshots are written to.
+            duration (float): Number of seconds to sample for each snapshot.
+        """
+        self._output_dir = output_dir
+        self._duration = duration
+        self._loop_thread_id: int | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def install_signal_handler(self, signal_number: int = getattr(signal, "SIGUSR1", 0)) -> bool:
+        """
+        Starts a snapshot whenever the process receives the signal (SIGUSR1 by default).
+        Must be called from the loop thread. Returns False if signals are not supported.
+        """
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal_number, self.start)
+        except (NotImplementedError, RuntimeError, ValueError):
+            return False
+        return True
+
+    def start(self) -> None:
+        """Starts a snapshot in the background. Must be called from the loop thread."""
+        if self.is_running:
+            _LOGGER.warning("Profiler snapshot already in progress")
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        _LOGGER.info("Profiling event loop for %.0f seconds", self._duration)
+
+    def _sample(self) -> None:
+        stacks: Counter[str] = Counter()
+        deadline = time.monotonic() + self._duration
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                stacks[_fold_stack(frame)] += 1
+            del frame
+            time.sleep(PROFILER_SAMPLE_INTERVAL)
+
+        path = os.path.join(self._output_dir, f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.folded")
+        try:
+            os.makedirs(self._output_dir, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as file:
+                for stack, count in stacks.most_common():
+                    file.write(f"{stack} {count}\n")
+        except OSError as e:
+            _LOGGER.error("Failed to write profile snapshot %s: %s", path, e)
+            return
+        _LOGGER.info("Wrote profile snapshot with %d samples to %s", stacks.total(), path)
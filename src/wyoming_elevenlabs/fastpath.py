@@ -0,0 +1,169 @@
+import json
+import os
+import secrets
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from io import BytesIO
+from typing import BinaryIO
+
+import httpx
+
+from .utilities import Transcription
+
+FILE_READ_CHUNK_SIZE = 64 * 1024  # Bytes per read when streaming a file from disk
+
+
+def create_shared_http_client(max_connections: int = 20) -> httpx.AsyncClient:
+    """
+    Creates the HTTP connection pool shared by all direct audio clients.
+
+    Args:
+        max_connections (int): The maximum number of pooled connections.
+
+    Returns:
+        httpx.AsyncClient: A keep-alive connection pool without a base URL.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        timeout=httpx.Timeout(60.0, connect=5.0),
+    )
+
+
+class DirectSpeechResponse:
+    """
+    A streaming speech response with the same iter_bytes() interface as the SDK's streaming response.
+    """
+    def __init__(self, response: httpx.Response):
+        self._response = response
+
+    @property
+    def headers(self) -> httpx.Headers:
+        return self._response.headers
+
+    def iter_bytes(self, chunk_size: int | None = None) -> AsyncIterator[bytes]:
+        return self._response.aiter_bytes(chunk_size=chunk_size)
+
+
+class DirectAudioClient:
+    """
+    A minimal client for the two hot-path endpoints (/audio/speech and /audio/transcriptions).
+
+    Requests are sent on a shared connection pool with headers built once. There is no request
+    model validation or response wrapping, and the multipart body streams straight from the
+    recording buffer without being copied. Error responses raise httpx.HTTPStatusError, which
+    carries the status code and headers needed for rate limiting.
+    """
+    def __init__(self, http_client: httpx.AsyncClient, base_url: str, api_key: str | None = None):
+        """
+        Initializes a DirectAudioClient instance.
+
+        Args:
+            http_client (httpx.AsyncClient): The shared connection pool.
+            base_url (str): The API base URL, for example https://api.elevenlabs.com/v1
+            api_key (str | None): Optional API key. No Authorization header is sent without one.
+        """
+        self._http_client = http_client
+        base_url = base_url.rstrip("/")
+        self._speech_url = httpx.URL(f"{base_url}/audio/speech")
+        self._transcriptions_url = httpx.URL(f"{base_url}/audio/transcriptions")
+
+        auth_headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._speech_headers = {**auth_headers, "Content-Type": "application/json"}
+        self._transcription_headers = {**auth_headers, "Accept": "application/json"}
+
+    @asynccontextmanager
+    async def stream_speech(
+        self,
+        model: str,
+        voice: str,
+        input: str,
+        speed: float | None = None,
+        instructions: str | None = None,
+    ) -> AsyncIterator[DirectSpeechResponse]:
+        """
+        Streams synthesized speech.
+
+        Args:
+            model (str): The TTS model.
+            voice (str): The voice.
+            input (str): The text to synthesize.
+            speed (float | None): Optional speed.
+            instructions (str | None): Optional instructions.
+        """
+        body = {"model": model, "voice": voice, "input": input}
+        if speed:
+            body["speed"] = speed
+        if instructions:
+            body["instructions"] = instructions
+
+        request = self._http_client.build_request(
+            "POST", self._speech_url, content=json.dumps(body).encode(), headers=self._speech_headers
+        )
+        response = await self._http_client.send(request, stream=True)
+        try:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            yield DirectSpeechResponse(response)
+        finally:
+            await response.aclose()
+
+    async def transcribe(
+        self,
+        file: BinaryIO,
+        model: str,
+        temperature: float | None = None,
+        prompt: str | None = None,
+    ) -> Transcription:
+        """
+        Transcribes an audio file.
+
+        Args:
+            file (BinaryIO): The audio. An in-memory buffer is sent without copying; other files are streamed in chunks.
+            model (str): The STT model.
+            temperature (float | None): Optional sampling temperature.
+            prompt (str | None): Optional prompt.
+
+        Returns:
+            Transcription: The transcript text, with the response headers.
+        """
+        fields = {"model": model}
+        if temperature:
+            fields["temperature"] = str(temperature)
+        if prompt:
+            fields["prompt"] = prompt
+
+        boundary = secrets.token_hex(16)
+        filename = os.path.basename(getattr(file, "name", None) or "audio.wav")
+        preamble = "".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+            for name, value in fields.items()
+        )
+        preamble += f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\nContent-Type: audio/wav\r\n\r\n'
+        preamble = preamble.encode()
+        epilogue = f"\r\n--{boundary}--\r\n".encode()
+
+        file_size = file.seek(0, os.SEEK_END)
+        file.seek(0)
+
+        async def body() -> AsyncIterator[bytes]:
+            yield preamble
+            if isinstance(file, BytesIO):
+                # getvalue() shares the buffer's memory instead of copying it
+                yield file.getvalue()
+            else:
+                while chunk := file.read(FILE_READ_CHUNK_SIZE):
+                    yield chunk
+            yield epilogue
+
+        response = await self._http_client.post(
+            self._transcriptions_url,
+            content=body(),
+            headers={
+                **self._transcription_headers,
+                "Content-Type": f"multipart/form-data; boundary={boundary}",
+                "Content-Length": str(len(preamble) + file_size + len(epilogue)),
+            },
+        )
+        response.raise_for_status()
+        return Transcription(response.json()["text"], response.headers)
@@ -1,9 +1,9 @@
-import asyncio
 import logging
+import time
 import wave
+from contextlib import aclosing
 
-from elevenlabs import NOT_GIVEN
-from wyoming.asr import Transcribe, Transcript
+from wyoming.asr import Transcribe, Transcript, TranscriptChunk, TranscriptStart, TranscriptStop
 from wyoming.audio import AudioChunk, AudioStart, AudioStop
 from wyoming.event import Event
 from wyoming.info import AsrModel, AsrProgram, Attribution, Describe, Info, TtsProgram, TtsVoice
@@ -12,6 +12,12 @@ from wyoming.tts import Synthesize
 
 from . import __version__
 from .compatibility import CustomAsyncElevenLabs, TtsVoiceModel
+from .pacing import AudioPacer
+from .race import TranscriptionRace
+from .ratelimit import AdaptiveConcurrencyLimiter
+from .realtime import RealtimeTranscriptionSession
+from .routing import ModelRouter
+from .tracing import Trace, Tracer
 from .utilities import NamedBytesIO
 
 _LOGGER = logging.getLogger(__name__)
@@ -21,6 +27,7 @@ DEFAULT_AUDIO_CHANNELS = 1  # Mono audio
 DEFAULT_ASR_AUDIO_RATE = 16000  # Hz (Wyoming default)
 TTS_AUDIO_RATE = 24000  # Hz (ElevenLabs spec)
 TTS_CHUNK_SIZE = 2048  # Magical guess :)
+STT_STREAMING_FINAL_TIMEOUT = 5.0  # Seconds to wait for a realtime session to finalize
 
 class ElevenLabsEventHandler(AsyncEventHandler):
     def __init__(
@@ -28,22 +35,39 @@ class ElevenLabsEventHandler(AsyncEventHandler):
         *args,
         stt_client: CustomAsyncElevenLabs,
         tts_client: CustomAsyncElevenLabs,
-        client_lock: asyncio.Lock,
+        stt_limiter: AdaptiveConcurrencyLimiter,
+        tts_limiter: AdaptiveConcurrencyLimiter,
         asr_models: list[AsrModel],
         stt_temperature: float | None = None,
         stt_prompt: str | None = None,
+        stt_streaming: bool = False,
         tts_voices: list[TtsVoiceModel],
         tts_speed: float | None = None,
         tts_instructions: str | None = None,
+        tracer: Tracer | None = None,
+        stt_router: ModelRouter | None = None,
+        tts_router: ModelRouter | None = None,
+        tts_pacer: AudioPacer | None = None,
+        stt_race: TranscriptionRace | None = None,
         **kwargs
     ) -> None:
         super().__init__(*args, **kwargs)
 
-        self._client_lock = client_lock
+        self._stt_limiter = stt_limiter
+        self._tts_limiter = tts_limiter
+        self._tracer = tracer or Tracer()
+        self._stt_router = stt_router
+        self._stt_race = stt_race
+        self._tts_router = tts_router
+        self._tts_pacer = tts_pacer or AudioPacer()
+        if self._tts_pacer.enabled:
+            # Make writes wait for the client once the lead's worth of audio is unsent
+            self.writer.transport.set_write_buffer_limits(high=self._tts_pacer.write_buffer_limit)
 
         self._stt_client = stt_client
         self._stt_temperature = stt_temperature
         self._stt_prompt = stt_prompt
+        self._stt_streaming = stt_streaming and stt_client.supports_realtime_transcription
 
         self._tts_client = tts_client
         self._tts_speed = tts_speed
@@ -60,7 +84,8 @@ class ElevenLabsEventHandler(AsyncEventHandler):
                     ),
                     installed=True,
                     version=__version__,
-                    models=asr_models
+                    models=asr_models,
+                    supports_transcript_streaming=self._stt_streaming
                 )
             ],
             tts=[
@@ -83,6 +108,10 @@ class ElevenLabsEventHandler(AsyncEventHandler):
         self._wav_write_buffer: wave.Wave_write | None = None
         self._is_recording: bool = False
         self._current_asr_model: AsrModel | None = None
+        self._current_asr_language: str | None = None
+        self._realtime_session: RealtimeTranscriptionSession | None = None
+        self._interim_started: bool = False
+        self._stt_trace: Trace | None = None
 
     async def handle_event(self, event: Event) -> bool:
         """
@@ -130,6 +159,7 @@ class ElevenLabsEventHandler(AsyncEventHandler):
     async def _handle_transcribe(self, transcribe: Transcribe) -> bool:
         """Handle transcription request"""
         self._current_asr_model = self._get_asr_model(transcribe.name)
+        self._current_asr_language = transcribe.language
         if self._current_asr_model:
             if self._is_asr_language_supported(transcribe.language, self._current_asr_model):
                 return True
@@ -140,6 +170,16 @@ class ElevenLabsEventHandler(AsyncEventHandler):
 
     async def _handle_audio_start(self, sample_rate: int, audio_width: int, audio_channels: int) -> None:
         """Handle start of audio stream"""
+        if self._stt_trace:
+            self._stt_trace.finish("Recording restarted")
+        self._stt_trace = self._tracer.start_trace(
+            "stt",
+            model=self._current_asr_model.name if self._current_asr_model else None,
+            sample_rate=sample_rate,
+            streaming=self._stt_streaming
+        )
+        self._stt_trace.start_span("recording")
+
         self._is_recording = True
         self._wav_buffer = NamedBytesIO(name='recording.wav')
         self._wav_write_buffer = wave.open(self._wav_buffer, "wb")
@@ -149,10 +189,51 @@ class ElevenLabsEventHandler(AsyncEventHandler):
         _LOGGER.info("Recording started at %d Hz, %d channels, %d bytes per sample",
                      sample_rate, audio_channels, audio_width)
 
+        if self._stt_streaming:
+            await self._open_realtime_session(sample_rate, audio_width, audio_channels)
+
+    async def _open_realtime_session(self, sample_rate: int, audio_width: int, audio_channels: int) -> None:
+        """Open a realtime transcription session. The WAV buffer is kept as a batch fallback."""
+        await self._close_realtime_session()
+        self._interim_started = False
+
+        if audio_width != DEFAULT_AUDIO_WIDTH:
+            _LOGGER.warning("Realtime transcription requires 16-bit audio, falling back to batch transcription")
+            return
+        if not self._current_asr_model:
+            return
+
+        try:
+            self._realtime_session = self._stt_client.open_realtime_transcription(
+                model_name=self._current_asr_model.name,
+                sample_rate=sample_rate,
+                channels=audio_channels,
+                language=self._current_asr_language,
+                prompt=self._stt_prompt,
+                on_delta=self._handle_transcript_delta
+            )
+        except Exception as e:
+            _LOGGER.warning("Could not open realtime transcription session, falling back to batch transcription: %s", e)
+
+    async def _close_realtime_session(self) -> None:
+        """Close the realtime transcription session, if any"""
+        if self._realtime_session:
+            await self._realtime_session.close()
+            self._realtime_session = None
+
+    async def _handle_transcript_delta(self, text: str) -> None:
+        """Forward a partial transcript to the Wyoming client"""
+        if not self._interim_started:
+            self._interim_started = True
+            await self.write_event(TranscriptStart(language=self._current_asr_language).event())
+        await self.write_event(TranscriptChunk(text=text).event())
+
     async def _handle_audio_chunk(self, chunk: AudioChunk) -> None:
         """Handle audio chunk"""
         if self._is_recording and chunk.audio and self._wav_write_buffer:
             self._wav_write_buffer.writeframes(chunk.audio)
+            if self._realtime_session:
+                self._realtime_session.append(chunk.audio)
         else:
             _LOGGER.warning("Problem handling audio chunk")
 
@@ -164,43 +245,94 @@ class ElevenLabsEventHandler(AsyncEventHandler):
 
         self._is_recording = False
 
+        trace = self._stt_trace or self._tracer.start_trace("stt")
+        self._stt_trace = None
+        for span in trace.spans:
+            if span.name == "recording":
+                span.end()
+        error = None
+
         try:
             # Close the WAV file
+            audio_seconds = 0.0
             if self._wav_write_buffer:
+                audio_seconds = self._wav_write_buffer.getnframes() / self._wav_write_buffer.getframerate()
+                trace.root.attributes["audio_bytes"] = self._wav_buffer.tell()
                 self._wav_write_buffer.close()
                 self._wav_write_buffer = None
 
-            # Reset buffer position to start
-            self._wav_buffer.seek(0)
+            with trace.span("upstream_finalize"):
+                text = await self._finish_realtime_session()
+
+            if text is None and self._stt_race:
+                # Send the recording to every raced model and keep the fastest useful transcript
+                text = await self._stt_race.transcribe(self._wav_buffer, temperature=self._stt_temperature, prompt=self._stt_prompt, trace=trace)
+            elif text is None:
+                model_name = self._current_asr_model.name
+                request_started = 0.0
+
+                def create_transcription():
+                    nonlocal request_started
+                    request_started = time.monotonic()
+                    return self._stt_client.create_transcription(
+                        file=self._wav_buffer,
+                        model=model_name,
+                        temperature=self._stt_temperature,
+                        prompt=self._stt_prompt
+                    )
 
-            # Send to ElevenLabs for transcription
-            async with self._client_lock:
-                result = await self._stt_client.audio.transcriptions.create(
-                    file=self._wav_buffer,
-                    model=self._current_asr_model.name,
-                    temperature=self._stt_temperature or NOT_GIVEN,
-                    prompt=self._stt_prompt or NOT_GIVEN
-                )
+                # Send to ElevenLabs for transcription
+                try:
+                    text = await self._stt_limiter.call(create_transcription, trace=trace)
+                except Exception:
+                    if self._stt_router:
+                        self._stt_router.record_failure(model_name)
+                    raise
+                if self._stt_router and audio_seconds:
+                    # Latency grows with the recording, so models are compared per second of audio
+                    self._stt_router.record_success(model_name, (time.monotonic() - request_started) / audio_seconds)
+
+            with trace.span("write_transcript"):
+                if text:
+                    _LOGGER.info(f"Successfully transcribed: {text}")
+
+                    # Send transcript event
+                    transcript = Transcript(
+                        text=text
+                    )
+                    await self.write_event(transcript.event())
+                else:
+                    _LOGGER.warning("Received empty transcription result")
 
-            if result.text:
-                _LOGGER.info(f"Successfully transcribed: {result.text}")
-
-                # Send transcript event
-                transcript = Transcript(
-                    text=result.text
-                )
-                await self.write_event(transcript.event())
-            else:
-                _LOGGER.warning("Received empty transcription result")
+                if self._interim_started:
+                    await self.write_event(TranscriptStop().event())
 
         except Exception as e:
-            _LOGGER.exception("Error during transcription: %s", e)
+            error = e
+            _LOGGER.exception("Error during transcription (trace %s): %s", trace.trace_id, e)
         finally:
+            trace.finish(error)
+            self._interim_started = False
             self._wav_buffer.close()
             self._wav_buffer = None
 
+    async def _finish_realtime_session(self) -> str | None:
+        """Wait for the realtime session's final transcript. Returns None if batch transcription is needed."""
+        if not self._realtime_session:
+            return None
+
+        session = self._realtime_session
+        self._realtime_session = None
+        try:
+            return await session.finish(STT_STREAMING_FINAL_TIMEOUT)
+        except Exception as e:
+            _LOGGER.warning("Realtime transcription failed, falling back to batch transcription: %s", e)
+            return None
+
     def _get_asr_model(self, model_name: str | None = None) -> AsrModel | None:
-        """Get an ASR model by name or None"""
+        """Get an ASR model by name or None. Without a name, the router (if any) picks the model."""
+        if not model_name and self._stt_router:
+            model_name = self._stt_router.choose([model.name for program in self._wyoming_info.asr for model in program.models])
         for program in self._wyoming_info.asr:
             for model in program.models:
                 if model.name == model_name or not model_name:
@@ -223,7 +355,13 @@ class ElevenLabsEventHandler(AsyncEventHandler):
         _LOGGER.error("Unsupported ASR model %s for language %s", model_name, language)
 
     def _get_voice(self, name: str | None = None) -> TtsVoiceModel | None:
-        """Get a TTS voice by name or None"""
+        """Get a TTS voice by name or None. With a router, the fastest healthy model offering the voice is chosen."""
+        if self._tts_router:
+            voices = [voice for program in self._wyoming_info.tts for voice in program.voices]
+            candidates = [voice for voice in voices if voice.name == (name or voices[0].name)] if voices else []
+            model_name = self._tts_router.choose([voice.model_name for voice in candidates])
+            return next((voice for voice in candidates if voice.model_name == model_name), None)
+
         for program in self._wyoming_info.tts:
             for voice in program.voices:
                 if not name or voice.name == name:
@@ -250,6 +388,9 @@ class ElevenLabsEventHandler(AsyncEventHandler):
 
     async def _handle_synthesize(self, synthesize: Synthesize) -> bool:
         """Handle text-to-speech synthesis request"""
+        trace = self._tracer.start_trace("tts", characters=len(synthesize.text))
+        error = None
+        pending_model_name = None
         try:
             _LOGGER.debug("Handling synthesize request %s", synthesize)
 
@@ -264,18 +405,31 @@ class ElevenLabsEventHandler(AsyncEventHandler):
             voice = self._get_voice(requested_voice)
             if voice:
                 if not self._validate_tts_language(requested_language, voice):
+                    error = f"Language {requested_language} is not supported for voice {voice.name}"
                     return False
             else:
                 self._log_unsupported_voice(requested_voice)
+                error = f"Voice {requested_voice} is not supported" if requested_voice else "No TTS voices specified"
                 return False
 
-            async with self._client_lock, self._tts_client.audio.speech.with_streaming_response.create(
-                model=voice.model_name,
-                voice=voice.name,
-                input=synthesize.text,
-                speed=self._tts_speed or NOT_GIVEN,
-                instructions=self._tts_instructions or NOT_GIVEN
-            ) as response:
+            trace.root.attributes.update(model=voice.model_name, voice=voice.name)
+
+            pending_model_name = voice.model_name
+            request_started = 0.0
+
+            def open_speech_stream():
+                nonlocal request_started
+                request_started = time.monotonic()
+                return self._tts_client.create_speech_stream(
+                    model=voice.model_name,
+                    voice=voice.name,
+                    input=synthesize.text,
+                    speed=self._tts_speed,
+                    instructions=self._tts_instructions
+                )
+
+            async with self._tts_limiter.stream(open_speech_stream, trace=trace) as response:
+                    first_byte_span = trace.start_span("upstream_first_byte")
 
                     # Send audio start with required audio parameters
                     await self.write_event(
@@ -290,31 +444,68 @@ class ElevenLabsEventHandler(AsyncEventHandler):
                     timestamp = 0
                     samples_per_chunk = TTS_CHUNK_SIZE // DEFAULT_AUDIO_WIDTH  # bytes per sample
                     timestamp_increment = (samples_per_chunk / TTS_AUDIO_RATE) * 1000  # ms
-
-                    async for chunk in response.iter_bytes(chunk_size=TTS_CHUNK_SIZE):
-                        await self.write_event(
-                            AudioChunk(
-                                audio=chunk,
-                                rate=TTS_AUDIO_RATE,
-                                width=DEFAULT_AUDIO_WIDTH,
-                                channels=DEFAULT_AUDIO_CHANNELS,
-                                timestamp=int(timestamp)
-                            ).event()
-                        )
-                        timestamp += timestamp_increment
+                    stream_span = None
+
+                    def on_first_chunk():
+                        nonlocal pending_model_name
+                        first_byte_span.end()
+                        if self._tts_router:
+                            self._tts_router.record_success(voice.model_name, time.monotonic() - request_started)
+                        pending_model_name = None
+
+                    chunks = self._tts_pacer.pace(response.iter_bytes(chunk_size=TTS_CHUNK_SIZE), on_first_chunk=on_first_chunk)
+                    async with aclosing(chunks):
+                        async for chunk in chunks:
+                            if stream_span is None:
+                                stream_span = trace.start_span("stream_to_client")
+                            await self.write_event(
+                                AudioChunk(
+                                    audio=chunk,
+                                    rate=TTS_AUDIO_RATE,
+                                    width=DEFAULT_AUDIO_WIDTH,
+                                    channels=DEFAULT_AUDIO_CHANNELS,
+                                    timestamp=int(timestamp)
+                                ).event()
+                            )
+                            timestamp += timestamp_increment
+
+                    if stream_span:
+                        stream_span.end()
 
                     # Send audio stop
-                    await self.write_event(AudioStop(timestamp=timestamp).event())
+                    with trace.span("write_audio_stop"):
+                        await self.write_event(AudioStop(timestamp=timestamp).event())
 
                     _LOGGER.debug("Successfully synthesized: %s", synthesize.text[:100])
                     return True
 
         except Exception as e:
-            _LOGGER.exception("Error during synthesis: %s", e)
+            error = e
+            _LOGGER.exception("Error during synthesis (trace %s): %s", trace.trace_id, e)
+            # Only failures before the first byte count against the model
+            if self._tts_router and pending_model_name:
+                self._tts_router.record_failure(pending_model_name)
             return False
+        finally:
+            trace.finish(error)
+
+    async def disconnect(self) -> None:
+        """Release the state of an unfinished recording when the client disconnects"""
+        await self._close_realtime_session()
+        if self._stt_trace:
+            self._stt_trace.finish("Connection closed")
+            self._stt_trace = None
+        self._is_recording = False
+        if self._wav_write_buffer:
+            self._wav_write_buffer.close()
+            self._wav_write_buffer = None
+        if self._wav_buffer:
+            self._wav_buffer.close()
+            self._wav_buffer = None
 
     async def stop(self) -> None:
         """Stop the handler and close the clients"""
         await super().stop()
+        await self.disconnect()
         self._stt_client.close()
         self._tts_client.close()
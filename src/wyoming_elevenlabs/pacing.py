@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+# The sentinel placed on the buffer once the upstream stream is exhausted
+_END = object()
+
+
+class AudioPacer:
+    """
+    Paces streamed audio toward the Wyoming client.
+
+    Upstream audio is read into a bounded buffer by a background task. Output starts once
+    the prebuffer is filled (or the stream ends) and then runs at real time, at most lead_ms
+    ahead of playback. When the client falls behind, the writes (which await the transport's
+    drain) slow the consumer down, the buffer fills up, and reading from upstream stops until
+    there is room again. This keeps per-connection memory bounded.
+
+    A pacer without a byte rate is disabled and passes chunks through as they arrive.
+    """
+    def __init__(
+        self,
+        bytes_per_second: int | None = None,
+        prebuffer_ms: float = 300.0,
+        lead_ms: float = 500.0,
+        max_buffer_ms: float = 3000.0,
+    ):
+        """
+        Initializes an AudioPacer instance.
+
+        Args:
+            bytes_per_second (int | None): The byte rate of the audio at real time, or None to disable pacing.
+            prebuffer_ms (float): Milliseconds of audio to buffer before output starts.
+            lead_ms (float): Milliseconds the output may run ahead of real time.
+            max_buffer_ms (float): Milliseconds of audio buffered at most before upstream reading pauses.
+        """
+        self._bytes_per_second = bytes_per_second
+        self._lead = lead_ms / 1000
+        if bytes_per_second:
+            self._prebuffer_bytes = int(bytes_per_second * prebuffer_ms / 1000)
+            self._max_buffer_bytes = max(int(bytes_per_second * max_buffer_ms / 1000), self._prebuffer_bytes)
+
+    @property
+    def enabled(self) -> bool:
+        return self._bytes_per_second is not None
+
+    @property
+    def write_buffer_limit(self) -> int:
+        """The transport write buffer size above which writes wait for the client (the lead's worth of audio)."""
+        return max(int(self._bytes_per_second * self._lead), 4096)
+
+    async def pace(self, chunks: AsyncIterator[bytes], on_first_chunk: Callable[[], None] | None = None) -> AsyncIterator[bytes]:
+        """
+        Yields the chunks at the paced rate.
+
+        Args:
+            chunks (AsyncIterator[bytes]): The upstream audio chunks.
+            on_first_chunk (Callable[[], None] | None): Called as soon as the first chunk arrives from upstream.
+        """
+        if not self.enabled:
+            async for chunk in chunks:
+                if on_first_chunk:
+                    on_first_chunk()
+                    on_first_chunk = None
+                yield chunk
+            return
+
+        buffer: asyncio.Queue = asyncio.Queue()
+        buffered_bytes = 0
+        room = asyncio.Condition()
+        ready = asyncio.Event()
+
+        def has_room() -> bool:
+            return buffered_bytes < self._max_buffer_bytes
+
+        async def read_upstream() -> None:
+            nonlocal buffered_bytes, on_first_chunk
+            try:
+                async for chunk in chunks:
+                    if on_first_chunk:
+                        on_first_chunk()
+                        on_first_chunk = None
+                    async with room:
+                        # Stop reading upstream while the buffer is full
+                        await room.wait_for(has_room)
+                        buffered_bytes += len(chunk)
+                    buffer.put_nowait(chunk)
+                    if buffered_bytes >= self._prebuffer_bytes:
+                        ready.set()
+                buffer.put_nowait(_END)
+            except Exception as e:
+                buffer.put_nowait(e)
+            finally:
+                ready.set()
+
+        reader = asyncio.create_task(read_upstream())
+        try:
+            await ready.wait()
+            started = time.monotonic()
+            sent_seconds = 0.0
+            while True:
+                item = await buffer.get()
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+
+                # Stay at most `lead` seconds ahead of real-time playback
+                delay = started + sent_seconds - self._lead - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                async with room:
+                    buffered_bytes -= len(item)
+                    room.notify_all()
+                sent_seconds += len(item) / self._bytes_per_second
+                yield item
+        finally:
+            reader.cancel()
+            await asyncio.wait([reader])
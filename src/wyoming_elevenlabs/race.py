@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import time
+
+from .compatibility import CustomAsyncElevenLabs
+from .ratelimit import AdaptiveConcurrencyLimiter
+from .tracing import Trace
+from .utilities import NamedBytesIO
+
+_LOGGER = logging.getLogger(__name__)
+
+SUMMARY_INTERVAL = 20  # Races between win-rate summaries
+MEASURE_INTERVAL = 10  # Every this many races also wait for the baseline, to keep its latency current
+LATENCY_ALPHA = 0.2  # Weight of the latest sample in each contestant's rolling latency
+
+
+class RaceContestant:
+    """
+    One STT model (on one endpoint) taking part in a transcription race.
+
+    Attributes:
+        label (str): The name used in logs and statistics, for example "whisper-1@http://speaches:8000/v1".
+        client (CustomAsyncElevenLabs): The STT client of the endpoint.
+        model_name (str): The STT model.
+        limiter (AdaptiveConcurrencyLimiter): The contestant's own concurrency limiter, so contestants never queue behind each other.
+    """
+    def __init__(self, label: str, client: CustomAsyncElevenLabs, model_name: str, limiter: AdaptiveConcurrencyLimiter):
+        self.label = label
+        self.client = client
+        self.model_name = model_name
+        self.limiter = limiter
+        self.wins = 0
+        self.latency: float | None = None
+
+    def record_latency(self, latency: float) -> None:
+        """Updates the rolling time-to-result with a finished request."""
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_ALPHA * (latency - self.latency)
+
+
+class TranscriptionRace:
+    """
+    Sends the same recording to several STT models at once and keeps the fastest useful answer.
+
+    The first non-empty transcript wins, unless a preferred contestant is configured and
+    delivers within the grace window after it, in which case the preferred transcript wins.
+    All other requests are cancelled. Every contestant that finishes updates its rolling
+    time-to-result, and the latency saved is estimated against the rolling time-to-result of the
+    preferred (or first) contestant, the baseline. So that the baseline is measured even when it
+    rarely wins, every MEASURE_INTERVAL-th race also waits for it before returning. Win rates,
+    rolling latencies and the average latency saved are logged periodically.
+    """
+    def __init__(self, contestants: list[RaceContestant], preferred_label: str | None = None, grace_ms: float = 300.0):
+        """
+        Initializes a TranscriptionRace instance.
+
+        Args:
+            contestants (list[RaceContestant]): The models taking part.
+            preferred_label (str | None): The label of the contestant whose transcript is preferred.
+            grace_ms (float): Milliseconds to wait for the preferred contestant after the first transcript arrives.
+        """
+        self._contestants = contestants
+        self._preferred = next((contestant for contestant in contestants if contestant.label == preferred_label), None)
+        if preferred_label and not self._preferred:
+            _LOGGER.warning("Preferred STT race model %s is not one of the contestants", preferred_label)
+        self._baseline = self._preferred or contestants[0]
+        self._grace = grace_ms / 1000
+        self._races = 0
+        self._measured_races = 0
+        self._saved_seconds = 0.0
+
+    @property
+    def labels(self) -> list[str]:
+        return [contestant.label for contestant in self._contestants]
+
+    async def transcribe(self, recording: NamedBytesIO, temperature: float | None = None, prompt: str | None = None, trace: Trace | None = None) -> str | None:
+        """
+        Races the contestants on a finished recording.
+
+        Args:
+            recording (NamedBytesIO): The finished WAV recording.
+            temperature (float | None): Optional sampling temperature.
+            prompt (str | None): Optional prompt.
+            trace (Trace | None): Optional trace that receives one span per contestant.
+
+        Returns:
+            str | None: The winning transcript, or None if no contestant produced one.
+        """
+        # Every contestant gets its own file object; BytesIO shares the bytes instead of copying them
+        audio = recording.getvalue()
+        started = time.monotonic()
+
+        async def run(contestant: RaceContestant) -> tuple[str, float]:
+            def create_transcription():
+                return contestant.client.create_transcription(
+                    file=NamedBytesIO(audio, name=recording.name),
+                    model=contestant.model_name,
+                    temperature=temperature,
+                    prompt=prompt
+                )
+            text = await contestant.limiter.call(create_transcription, trace=trace, span_name=f"race:{contestant.label}")
+            finished = time.monotonic()
+            contestant.record_latency(finished - started)
+            return text, finished
+
+        tasks = {asyncio.create_task(run(contestant)): contestant for contestant in self._contestants}
+        baseline_task = next(task for task, contestant in tasks.items() if contestant is self._baseline)
+        pending = set(tasks)
+        first: tuple[RaceContestant, str, float] | None = None
+        winner: tuple[RaceContestant, str, float] | None = None
+        try:
+            while pending and winner is None:
+                timeout = None if first is None else max(0.0, first[2] + self._grace - time.monotonic())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # The grace window passed without the preferred transcript
+                    winner = first
+                    break
+                for task in done:
+                    contestant = tasks[task]
+                    if task.exception():
+                        _LOGGER.debug("STT race contestant %s failed: %s", contestant.label, task.exception())
+                        continue
+                    text, finished = task.result()
+                    if not text or not text.strip():
+                        continue
+                    result = (contestant, text, finished)
+                    if contestant is self._preferred:
+                        winner = result
+                    elif first is None:
+                        first = result
+                # Without a (still running) preferred contestant there is nothing to wait for
+                if winner is None and first and (self._preferred is None or self._preferred not in (tasks[task] for task in pending)):
+                    winner = first
+            if winner is None:
+                winner = first
+            if winner and baseline_task in pending and self._races % MEASURE_INTERVAL == 0:
+                # A sampled race: the transcript is already decided, only the baseline latency is awaited
+                await asyncio.wait({baseline_task})
+                pending.discard(baseline_task)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        self._record(winner, started)
+        return winner[1] if winner else None
+
+    def _record(self, winner: tuple[RaceContestant, str, float] | None, started: float) -> None:
+        self._races += 1
+        if winner:
+            contestant, _, finished = winner
+            contestant.wins += 1
+            if self._baseline.latency is not None:
+                # Zero when the baseline won; otherwise an estimate from its rolling time-to-result
+                self._measured_races += 1
+                self._saved_seconds += self._baseline.latency - (finished - started) if contestant is not self._baseline else 0.0
+            _LOGGER.debug("STT race won by %s in %.0f ms", contestant.label, (finished - started) * 1000)
+        else:
+            _LOGGER.warning("STT race produced no transcript")
+
+        if self._races % SUMMARY_INTERVAL == 0:
+            contestants = ", ".join(
+                f"{contestant.label} {contestant.wins / self._races:.0%} wins"
+                + (f" ({contestant.latency * 1000:.0f} ms)" if contestant.latency is not None else "")
+                for contestant in self._contestants
+            )
+            saved = f"{self._saved_seconds / self._measured_races * 1000:.0f} ms" if self._measured_races else "unknown"
+            _LOGGER.info("STT race summary after %d races: %s; about %s saved per race versus %s",
+                         self._races, contestants, saved, self._baseline.label)
@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Mapping
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import TypeVar
+
+from .tracing import Trace
+
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({429, 503})
+BACKOFF_BASE = 0.25  # Seconds
+BACKOFF_CAP = 4.0  # Seconds
+LATENCY_TOLERANCE = 2.0  # Successes slower than this multiple of the baseline count as congestion
+LATENCY_BASELINE_ALPHA = 0.1  # Weight of new samples in the latency baseline
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _status_and_headers(error: BaseException) -> tuple[int | None, Mapping[str, str]]:
+    """Extracts the HTTP status code and headers from an SDK or httpx exception."""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    headers = getattr(error, "headers", None) or getattr(response, "headers", None) or {}
+    return status, headers
+
+
+def _parse_duration(value: str) -> float | None:
+    """Parses rate-limit reset durations such as '1s', '250ms' or '6m0s' into seconds."""
+    matches = _DURATION_PATTERN.findall(value)
+    if not matches:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in matches)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> float | None:
+    """
+    Determines how long to wait before the next request from rate-limit response headers.
+
+    Args:
+        headers (Mapping[str, str]): The (case-insensitive) response headers.
+
+    Returns:
+        float | None: Seconds to wait, or None if the headers do not say.
+    """
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+
+    value = headers.get("x-ratelimit-reset-requests") or headers.get("x-ratelimit-reset")
+    if value:
+        return _parse_duration(value)
+    return None
+
+
+class RateLimitedError(Exception):
+    """Raised when an upstream request could not be completed within its deadline because of rate limiting."""
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits the number of in-flight upstream requests to one backend using AIMD
+    (additive increase, multiplicative decrease).
+
+    Each successful request raises the limit by 1/limit. A rate-limited (429/503) response
+    halves it and pauses new requests until the server's Retry-After has passed. Streams that
+    take much longer to open than the latency baseline shrink the limit slightly, so a saturated
+    backend is not pushed further. Whole requests (call) are not compared, because their latency
+    grows with the payload (for example the length of an utterance). Rate-limited requests are retried with jittered exponential
+    backoff until their deadline.
+    """
+    def __init__(self, name: str, max_limit: int = 4, initial_limit: int = 1, deadline: float = 30.0):
+        """
+        Initializes an AdaptiveConcurrencyLimiter instance.
+
+        Args:
+            name (str): The name used in log messages, for example "STT".
+            max_limit (int): The maximum number of concurrent in-flight requests.
+            initial_limit (int): The number of concurrent in-flight requests to start with.
+            deadline (float): Default number of seconds a request may spend queueing and retrying.
+        """
+        self.name = name
+        self._max_limit = max(1, max_limit)
+        self._limit = float(min(max(1, initial_limit), self._max_limit))
+        self._deadline = deadline
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._latency_baseline: float | None = None
+        self._condition = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def call(self, operation: Callable[[], Awaitable[T]], trace: Trace | None = None, span_name: str = "upstream_request") -> T:
+        """
+        Runs a request within the concurrency limit, retrying on rate limiting.
+
+        Args:
+            operation (Callable[[], Awaitable[T]]): Creates the request. Called once per attempt.
+            trace (Trace | None): Optional trace that receives queue_wait and request spans.
+            span_name (str): The name of the request span.
+
+        Returns:
+            T: The result of the operation.
+        """
+        deadline = time.monotonic() + self._deadline
+        attempt = 0
+        while True:
+            await self._acquire(deadline, trace)
+            span = trace.start_span(span_name, attempt=attempt) if trace else None
+            error = None
+            try:
+                result = await operation()
+            except Exception as e:
+                error = e
+            finally:
+                await self._release()
+            if span:
+                span.end(error)
+            if error is None:
+                # The duration of a whole request depends on its size, so it is no congestion signal;
+                # results with headers (such as a Transcription) still report exhausted rate limits
+                self._on_success(None, getattr(result, "headers", None))
+                return result
+            # The slot is released before backing off so other requests can proceed
+            attempt = await self._handle_failure(error, attempt, deadline)
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        open_stream: Callable[[], AbstractAsyncContextManager[T]],
+        trace: Trace | None = None,
+        span_name: str = "upstream_connect"
+    ) -> AsyncIterator[T]:
+        """
+        Opens a streaming response within the concurrency limit, retrying on rate limiting.
+        The slot is held until the stream is closed. Errors after the stream was opened are not retried.
+
+        Args:
+            open_stream (Callable[[], AbstractAsyncContextManager[T]]): Creates the streaming request. Called once per attempt.
+            trace (Trace | None): Optional trace that receives queue_wait and connect spans.
+            span_name (str): The name of the connect span.
+        """
+        deadline = time.monotonic() + self._deadline
+        attempt = 0
+        while True:
+            await self._acquire(deadline, trace)
+            span = trace.start_span(span_name, attempt=attempt) if trace else None
+            started = time.monotonic()
+            opened = False
+            error = None
+            try:
+                async with open_stream() as response:
+                    opened = True
+                    if span:
+                        span.end()
+                    self._on_success(time.monotonic() - started, getattr(response, "headers", None))
+                    yield response
+                    return
+            except Exception as e:
+                if opened:
+                    raise
+                error = e
+            finally:
+                await self._release()
+            if span:
+                span.end(error)
+            attempt = await self._handle_failure(error, attempt, deadline)
+
+    async def _acquire(self, deadline: float, trace: Trace | None) -> None:
+        span = trace.start_span("queue_wait") if trace else None
+        try:
+            async with self._condition:
+                while True:
+                    now = time.monotonic()
+                    if now >= deadline:
+                        raise RateLimitedError(f"{self.name} request deadline exceeded while queued")
+                    if now < self._paused_until:
+                        wait = self._paused_until - now
+                    elif self._in_flight < int(self._limit):
+                        break
+                    else:
+                        wait = None
+                    try:
+                        # Wake up when a slot is released, the pause ends or the deadline passes
+                        timeout = min(wait if wait is not None else deadline - now, deadline - now)
+                        await asyncio.wait_for(self._condition.wait(), timeout)
+                    except TimeoutError:
+                        pass
+                self._in_flight += 1
+        finally:
+            if span:
+                span.end()
+
+    async def _release(self) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    async def _handle_failure(self, error: Exception, attempt: int, deadline: float) -> int:
+        """Adapts the limit to a failed attempt. Returns the next attempt number or re-raises if it must not be retried."""
+        status, headers = _status_and_headers(error)
+        if status not in RETRYABLE_STATUS_CODES:
+            raise error
+
+        retry_after = parse_retry_after(headers)
+        self._limit = max(1.0, self._limit / 2)
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+        backoff = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+        delay = max(retry_after or 0.0, backoff)
+        if time.monotonic() + delay >= deadline:
+            raise RateLimitedError(f"{self.name} backend is rate limiting (HTTP {status}) beyond the request deadline") from error
+
+        _LOGGER.warning("%s backend returned HTTP %s, retrying in %.2f s with concurrency limit %d", self.name, status, delay, self.limit)
+        await asyncio.sleep(delay)
+        return attempt + 1
+
+    def _on_success(self, latency: float | None, headers: Mapping[str, str] | None) -> None:
+        if latency is None:
+            self._limit = min(float(self._max_limit), self._limit + 1 / self._limit)
+        elif self._latency_baseline is None:
+            self._latency_baseline = latency
+        elif latency > self._latency_baseline * LATENCY_TOLERANCE:
+            # Treat a large increase in time-to-open as early congestion
+            self._limit = max(1.0, self._limit * 0.9)
+        else:
+            self._limit = min(float(self._max_limit), self._limit + 1 / self._limit)
+        if latency is not None:
+            self._latency_baseline += LATENCY_BASELINE_ALPHA * (latency - self._latency_baseline)
+
+        if headers and headers.get("x-ratelimit-remaining-requests") == "0":
+            # Out of quota: hold new requests until the window resets instead of collecting 429s
+            reset = parse_retry_after(headers)
+            if reset:
+                self._paused_until = max(self._paused_until, time.monotonic() + reset)
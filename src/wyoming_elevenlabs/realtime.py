@@ -0,0 +1,185 @@
+import asyncio
+import base64
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from urllib.parse import urlencode, urlsplit, urlunsplit
+
+from websockets.asyncio.client import ClientConnection, connect
+
+from .utilities import PcmResampler
+
+_LOGGER = logging.getLogger(__name__)
+
+REALTIME_AUDIO_RATE = 24000  # Hz (Realtime API pcm16 spec)
+
+# The sentinel placed on the outgoing queue once the audio buffer should be committed
+_COMMIT = object()
+
+
+def realtime_transcription_url(base_url: str) -> str:
+    """
+    Converts an HTTP(S) API base URL into the realtime transcription WebSocket URL.
+
+    Args:
+        base_url (str): The HTTP(S) base URL of the API, for example https://api.elevenlabs.com/v1
+
+    Returns:
+        str: The WebSocket URL for a realtime transcription session.
+    """
+    parts = urlsplit(base_url)
+    scheme = "wss" if parts.scheme == "https" else "ws"
+    path = parts.path.rstrip("/") + "/realtime"
+    return urlunsplit((scheme, parts.netloc, path, urlencode({"intent": "transcription"}), ""))
+
+
+class RealtimeTranscriptionSession:
+    """
+    A realtime (WebSocket) transcription session using the Realtime API transcription intent.
+
+    Audio is accepted immediately and queued while the connection is being established, so
+    opening a session never blocks the Wyoming event loop. Partial transcripts are reported
+    through an optional callback, and the final transcript is returned by finish().
+    """
+    def __init__(
+        self,
+        url: str,
+        headers: dict[str, str],
+        model: str,
+        sample_rate: int,
+        channels: int,
+        language: str | None = None,
+        prompt: str | None = None,
+        on_delta: Callable[[str], Awaitable[None]] | None = None,
+    ):
+        """
+        Initializes a RealtimeTranscriptionSession instance. Call start() to connect.
+
+        Args:
+            url (str): The WebSocket URL of the realtime endpoint.
+            headers (dict[str, str]): Additional headers for the WebSocket handshake (authorization).
+            model (str): The name of the transcription model.
+            sample_rate (int): The sample rate of the incoming 16-bit PCM audio in Hz.
+            channels (int): The number of channels of the incoming audio.
+            language (str | None): Optional language hint for the transcription model.
+            prompt (str | None): Optional prompt for the transcription model.
+            on_delta (Callable[[str], Awaitable[None]] | None): Optional callback for partial transcripts.
+        """
+        self._url = url
+        self._headers = headers
+        self._model = model
+        self._language = language
+        self._prompt = prompt
+        self._on_delta = on_delta
+        self._resampler = PcmResampler(sample_rate, REALTIME_AUDIO_RATE, channels)
+        self._outgoing: asyncio.Queue[bytes | object] = asyncio.Queue()
+        self._final: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Connects in the background. Audio appended before the connection is ready is queued."""
+        self._task = asyncio.create_task(self._run())
+
+    def append(self, audio: bytes) -> None:
+        """Queues a chunk of 16-bit PCM audio for the session."""
+        if not self._final.done():
+            self._outgoing.put_nowait(self._resampler.process(audio))
+
+    async def finish(self, timeout: float) -> str:
+        """
+        Commits the audio buffer and waits for the final transcript.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait for the server to finalize.
+
+        Returns:
+            str: The final transcript text.
+        """
+        self._outgoing.put_nowait(_COMMIT)
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._final), timeout)
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        """Closes the session and its connection."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if not self._final.done():
+            self._final.cancel()
+        elif not self._final.cancelled():
+            # Mark a failure as retrieved when the session is closed without finishing
+            self._final.exception()
+
+    async def _run(self) -> None:
+        _LOGGER.debug("Opening realtime transcription session at %s", self._url)
+        try:
+            async with connect(self._url, additional_headers=self._headers) as websocket:
+                await websocket.send(json.dumps(self._session_update()))
+                receiver = asyncio.create_task(self._receive(websocket))
+                sender = asyncio.create_task(self._send(websocket))
+                try:
+                    # The receiver can end first (server error or closed connection), before the commit is queued
+                    done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+                    if sender in done:
+                        sender.result()
+                        await receiver
+                    else:
+                        receiver.result()
+                finally:
+                    sender.cancel()
+                    receiver.cancel()
+            if not self._final.done():
+                self._final.set_exception(ConnectionError("Realtime session closed before the transcript was finalized"))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not self._final.done():
+                self._final.set_exception(e)
+
+    def _session_update(self) -> dict:
+        transcription = {"model": self._model}
+        if self._language:
+            transcription["language"] = self._language
+        if self._prompt:
+            transcription["prompt"] = self._prompt
+        return {
+            "type": "transcription_session.update",
+            "session": {
+                "input_audio_format": "pcm16",
+                "input_audio_transcription": transcription,
+                # The Wyoming client decides when the utterance ends (AudioStop)
+                "turn_detection": None,
+            },
+        }
+
+    async def _send(self, websocket: ClientConnection) -> None:
+        while True:
+            item = await self._outgoing.get()
+            if item is _COMMIT:
+                await websocket.send(json.dumps({"type": "input_audio_buffer.commit"}))
+                return
+            if item:
+                await websocket.send(json.dumps({
+                    "type": "input_audio_buffer.append",
+                    "audio": base64.b64encode(item).decode("ascii"),
+                }))
+
+    async def _receive(self, websocket: ClientConnection) -> None:
+        async for message in websocket:
+            event = json.loads(message)
+            event_type = event.get("type")
+            if event_type == "conversation.item.input_audio_transcription.delta":
+                if self._on_delta and event.get("delta"):
+                    await self._on_delta(event["delta"])
+            elif event_type == "conversation.item.input_audio_transcription.completed":
+                if not self._final.done():
+                    self._final.set_result(event.get("transcript", ""))
+                return
+            elif event_type == "error":
+                error = event.get("error", {})
+                raise RuntimeError(f"Realtime transcription error: {error.get('message', error)}")
@@ -0,0 +1,92 @@
+import logging
+import statistics
+import time
+from collections import deque
+from enum import Enum
+
+_LOGGER = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 20  # Number of recent latency samples kept per model
+MIN_SAMPLES = 3  # Models with fewer samples are tried first so they get measured
+ERROR_RATE_ALPHA = 0.2  # Weight of the latest outcome in the error rate
+ERROR_RATE_THRESHOLD = 0.5  # A model above this error rate is degraded
+DEGRADED_COOLDOWN = 30.0  # Seconds a degraded model receives no routed traffic
+
+
+class ModelRoutingPolicy(Enum):
+    FIRST = 0  # The first configured model offering the voice (default)
+    LATENCY = 1  # The fastest healthy model offering the voice
+
+
+class _ModelStats:
+    def __init__(self):
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.error_rate = 0.0
+        self.degraded_until = 0.0
+
+
+class ModelRouter:
+    """
+    Routes requests that do not name a model to the fastest healthy model.
+
+    Tracks a rolling window of time-to-first-byte (TTS) or request latency per second of audio (STT) and an
+    exponentially weighted error rate per model. A model whose error rate passes the threshold
+    is degraded and skipped for a cooldown period. Models without enough samples are tried
+    first so that every model gets measured.
+    """
+    def __init__(self, name: str):
+        """
+        Initializes a ModelRouter instance.
+
+        Args:
+            name (str): The name used in log messages, for example "TTS".
+        """
+        self.name = name
+        self._stats: dict[str, _ModelStats] = {}
+
+    def _get_stats(self, model_name: str) -> _ModelStats:
+        stats = self._stats.get(model_name)
+        if stats is None:
+            stats = self._stats[model_name] = _ModelStats()
+        return stats
+
+    def record_success(self, model_name: str, latency: float) -> None:
+        """Records a successful request and its latency (seconds, or seconds per audio second for STT)."""
+        stats = self._get_stats(model_name)
+        stats.latencies.append(latency)
+        stats.error_rate *= 1 - ERROR_RATE_ALPHA
+
+    def record_failure(self, model_name: str) -> None:
+        """Records a failed request. Degrades the model if its error rate passes the threshold."""
+        stats = self._get_stats(model_name)
+        stats.error_rate = stats.error_rate * (1 - ERROR_RATE_ALPHA) + ERROR_RATE_ALPHA
+        now = time.monotonic()
+        if stats.error_rate > ERROR_RATE_THRESHOLD and stats.degraded_until <= now:
+            stats.degraded_until = now + DEGRADED_COOLDOWN
+            _LOGGER.warning("%s model %s is degraded (error rate %.0f%%), avoiding it for %.0f s",
+                            self.name, model_name, stats.error_rate * 100, DEGRADED_COOLDOWN)
+
+    def is_degraded(self, model_name: str) -> bool:
+        return self._get_stats(model_name).degraded_until > time.monotonic()
+
+    def choose(self, model_names: list[str]) -> str | None:
+        """
+        Chooses a model from the candidates.
+
+        Args:
+            model_names (list[str]): The candidate models, in configured order.
+
+        Returns:
+            str | None: The chosen model, or None if there are no candidates.
+        """
+        if not model_names:
+            return None
+
+        # If every candidate is degraded, fall back to all of them rather than failing
+        healthy = [model_name for model_name in model_names if not self.is_degraded(model_name)] or model_names
+
+        for model_name in healthy:
+            if len(self._get_stats(model_name).latencies) < MIN_SAMPLES:
+                return model_name
+
+        return min(healthy, key=lambda model_name: statistics.median(self._stats[model_name].latencies))
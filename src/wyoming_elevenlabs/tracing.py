@@ -0,0 +1,195 @@
+import json
+import logging
+import queue
+import random
+import secrets
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+_LOGGER = logging.getLogger(__name__)
+
+STATUS_CODE_OK = "STATUS_CODE_OK"
+STATUS_CODE_ERROR = "STATUS_CODE_ERROR"
+
+
+def _otel_attributes(attributes: dict) -> list[dict]:
+    """Converts a flat dict into the OpenTelemetry (OTLP JSON) key/value attribute list."""
+    result = []
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            typed_value = {"boolValue": value}
+        elif isinstance(value, int):
+            typed_value = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed_value = {"doubleValue": value}
+        else:
+            typed_value = {"stringValue": str(value)}
+        result.append({"key": key, "value": typed_value})
+    return result
+
+
+class Span:
+    """
+    A single timed stage of a request.
+
+    Attributes:
+        name (str): The name of the stage.
+        span_id (str): The 8 byte hex span ID.
+        parent_span_id (str | None): The span ID of the parent, or None for the root span.
+    """
+    def __init__(self, trace: "Trace", name: str, parent_span_id: str | None, attributes: dict):
+        self._trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.attributes = attributes
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns: int | None = None
+        self.error: str | None = None
+
+    @property
+    def is_ended(self) -> bool:
+        return self.end_time_ns is not None
+
+    @property
+    def duration_ms(self) -> float:
+        end_time_ns = self.end_time_ns if self.end_time_ns is not None else time.time_ns()
+        return (end_time_ns - self.start_time_ns) / 1_000_000
+
+    def end(self, error: BaseException | str | None = None) -> None:
+        """Ends the span. Ending an already ended span has no effect."""
+        if self.end_time_ns is None:
+            self.end_time_ns = time.time_ns()
+            if error is not None:
+                self.error = str(error) or type(error).__name__
+
+    def to_otel(self) -> dict:
+        """Serializes the span in the OpenTelemetry (OTLP JSON) span shape."""
+        status = {"code": STATUS_CODE_ERROR, "message": self.error} if self.error else {"code": STATUS_CODE_OK}
+        return {
+            "traceId": self._trace.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "kind": "SPAN_KIND_SERVER" if self.parent_span_id is None else "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": str(self.start_time_ns),
+            "endTimeUnixNano": str(self.end_time_ns),
+            "attributes": _otel_attributes(self.attributes),
+            "status": status,
+        }
+
+
+class Trace:
+    """
+    All spans of one STT or TTS request, sharing a trace ID.
+    The root span covers the whole request; stages are its children.
+    """
+    def __init__(self, tracer: "Tracer", name: str, attributes: dict):
+        self._tracer = tracer
+        self.trace_id = secrets.token_hex(16)
+        self.root = Span(self, name, None, attributes)
+        self.spans: list[Span] = [self.root]
+
+    def start_span(self, name: str, **attributes) -> Span:
+        """Starts a child span of the root span. The caller must end() it."""
+        span = Span(self, name, self.root.span_id, attributes)
+        self.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """Context manager that times a child span and records any exception raised in it."""
+        span = self.start_span(name, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.end(e)
+            raise
+        span.end()
+
+    def finish(self, error: BaseException | str | None = None) -> None:
+        """Ends all open spans and hands the trace to the tracer for sampling and export."""
+        if self.root.is_ended:
+            return
+        for span in reversed(self.spans):
+            span.end(error)
+        self._tracer.export(self)
+
+
+class Tracer:
+    """
+    Writes request traces as JSONL (one OpenTelemetry span per line) to a rotating file.
+
+    Traces slower than the threshold, or which failed, are always written. All other
+    traces are sampled at the given rate. Writing happens on a background thread so the
+    event loop never blocks on file I/O. A Tracer without a path is disabled: traces are
+    still timed, but nothing is written.
+    """
+    def __init__(
+        self,
+        path: str | None = None,
+        slow_threshold_ms: float = 1500.0,
+        sample_rate: float = 0.01,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+    ):
+        """
+        Initializes a Tracer instance.
+
+        Args:
+            path (str | None): Path of the JSONL trace file, or None to disable writing.
+            slow_threshold_ms (float): Traces taking at least this long are always written.
+            sample_rate (float): Fraction (0.0 to 1.0) of the remaining traces to write.
+            max_bytes (int): Size at which the trace file is rotated.
+            backup_count (int): Number of rotated trace files to keep.
+        """
+        self._slow_threshold_ms = slow_threshold_ms
+        self._sample_rate = sample_rate
+        self._logger: logging.Logger | None = None
+        self._listener: QueueListener | None = None
+
+        if path:
+            file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+            file_handler.setFormatter(logging.Formatter("%(message)s"))
+            records: queue.SimpleQueue = queue.SimpleQueue()
+            self._listener = QueueListener(records, file_handler)
+            self._listener.start()
+
+            self._logger = logging.getLogger(f"{__name__}.export")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            self._logger.addHandler(QueueHandler(records))
+
+    @property
+    def enabled(self) -> bool:
+        return self._logger is not None
+
+    def start_trace(self, name: str, **attributes) -> Trace:
+        """Starts a new trace whose root span has the given name and attributes."""
+        return Trace(self, name, attributes)
+
+    def export(self, trace: Trace) -> None:
+        """Writes the trace if it is slow, failed, or sampled."""
+        if not self._logger:
+            return
+
+        slow = trace.root.duration_ms >= self._slow_threshold_ms
+        failed = any(span.error for span in trace.spans)
+        if not (slow or failed or random.random() < self._sample_rate):
+            return
+
+        trace.root.attributes["trace.sampled_reason"] = "slow" if slow else "error" if failed else "sampled"
+        for span in trace.spans:
+            self._logger.info(json.dumps(span.to_otel(), separators=(",", ":")))
+        if slow:
+            _LOGGER.info("Slow %s request %s took %.0f ms", trace.root.name, trace.trace_id, trace.root.duration_ms)
+
+    def close(self) -> None:
+        """Flushes pending traces and stops the background writer."""
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
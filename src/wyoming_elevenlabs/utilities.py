@@ -1,3 +1,6 @@
+import sys
+from array import array
+from collections.abc import Mapping
 from io import BytesIO
 
 
@@ -27,3 +30,84 @@ class NamedBytesIO(BytesIO):
             str: The name or filename associated with this byte stream.
         """
         return self._name
+
+
+class Transcription(str):
+    """
+    A subclass of str for transcript text that keeps the headers of the response it came from,
+    so rate-limit headers reach the concurrency limiter.
+    """
+    headers: Mapping[str, str] | None
+
+    def __new__(cls, text: str, headers: Mapping[str, str] | None = None):
+        """
+        Create a new Transcription instance.
+
+        Args:
+            text (str): The transcript text.
+            headers (Mapping[str, str] | None): The (case-insensitive) response headers.
+        """
+        transcription = super().__new__(cls, text)
+        transcription.headers = headers
+        return transcription
+
+
+class PcmResampler:
+    """
+    Streaming linear-interpolation resampler for 16-bit little-endian PCM.
+
+    Multi-channel input is reduced to mono by taking the first channel. State is
+    carried between calls so chunk boundaries do not introduce clicks.
+    """
+    def __init__(self, from_rate: int, to_rate: int, channels: int = 1):
+        """
+        Initialize a new PcmResampler instance.
+
+        Args:
+            from_rate (int): The sample rate of the incoming audio in Hz.
+            to_rate (int): The sample rate of the outgoing audio in Hz.
+            channels (int): The number of interleaved channels in the incoming audio.
+        """
+        self._step = from_rate / to_rate
+        self._channels = channels
+        self._position = 0.0
+        self._previous: int | None = None
+
+    def process(self, audio: bytes) -> bytes:
+        """
+        Resamples a chunk of audio.
+
+        Args:
+            audio (bytes): Interleaved 16-bit PCM frames.
+
+        Returns:
+            bytes: Mono 16-bit PCM frames at the target rate.
+        """
+        samples = array('h')
+        samples.frombytes(audio[:len(audio) - len(audio) % (2 * self._channels)])
+        if sys.byteorder == 'big':
+            samples.byteswap()
+        if self._channels > 1:
+            samples = samples[::self._channels]
+
+        if self._step == 1.0:
+            output = samples
+        else:
+            # Prepend the last sample of the previous chunk so interpolation is continuous
+            if self._previous is not None:
+                samples.insert(0, self._previous)
+            output = array('h')
+            position = self._position
+            last_index = len(samples) - 1
+            while position < last_index:
+                index = int(position)
+                fraction = position - index
+                output.append(int(samples[index] + (samples[index + 1] - samples[index]) * fraction))
+                position += self._step
+            if samples:
+                self._previous = samples[-1]
+                self._position = position - last_index
+
+        if sys.byteorder == 'big':
+            output.byteswap()
+        return output.tobytes()